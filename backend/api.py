@@ -0,0 +1,188 @@
+"""
+Headless JSON / SSE API around the roadmap pipeline in app.py, without Gradio.
+
+    POST /generate_roadmap   {"github_url": ..., "career_goal": ..., "preferred_stack": ...}
+    GET  /generate_roadmap?github_url=...&career_goal=...&preferred_stack=...
+
+Returns {"roadmap", "outcome", "cached"} as JSON, gzip-compressed when the
+client accepts it, with an ETag for the roadmap text (weak on a gzip body,
+and Vary: Accept-Encoding either way): a request carrying a matching
+If-None-Match for a cached roadmap gets a 304 without running the pipeline. With `Accept: text/event-stream` (or ?stream=1) the roadmap is
+streamed as server-sent events instead: "queued" events carry {"position"}
+while the request waits for a generation slot, "chunk" events carry {"delta"}
+(or {"text"} when the text was replaced rather than extended), and a final
+"done" event carries {"outcome", "cached", "etag"}. Requests refused by
+admission control get a 429 (client over its rate) or 503 (queue full) with
+a Retry-After header.
+
+    python api.py                        # development server on API_HOST:API_PORT
+    gunicorn -c gunicorn.conf.py api:api # production, with HTTP/1.1 keep-alive
+"""
+import gzip
+import hashlib
+import itertools
+import json
+import os
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask_cors import CORS
+from prometheus_flask_exporter import PrometheusMetrics
+
+import app as roadmap_app
+from modules.admission import QueuePosition, Rejection, client_key
+from modules.exact_cache import request_key
+from modules.metrics import RequestTrace, start_metrics_server
+
+# Comma-separated origins allowed to call the API from a browser (frontend/index.html).
+API_CORS_ORIGINS = os.getenv("API_CORS_ORIGINS", "*")
+# Responses smaller than this are not worth compressing.
+GZIP_MIN_BYTES = int(os.getenv("API_GZIP_MIN_BYTES", "512"))
+
+api = Flask(__name__)
+CORS(api, origins=API_CORS_ORIGINS.split(","), expose_headers=["ETag"])
+# Per-route request metrics, served by the shared /metrics server (path=None).
+PrometheusMetrics(api, path=None, group_by="endpoint")
+
+
+def roadmap_etag(roadmap: str) -> str:
+    return hashlib.sha256(roadmap.encode("utf-8")).hexdigest()[:32]
+
+
+def read_request():
+    """(github_url, career_goal, preferred_stack) from the JSON body or the query string."""
+    data = request.get_json(silent=True) if request.method == "POST" else None
+    data = data if isinstance(data, dict) else request.values
+    return tuple((data.get(field) or "").strip() for field in ("github_url", "career_goal", "preferred_stack"))
+
+
+def strip_banner(text: str) -> str:
+    banner = roadmap_app.CACHE_HIT_BANNER
+    return text[len(banner):] if text.startswith(banner) else text
+
+
+def wants_stream() -> bool:
+    return request.args.get("stream") == "1" or request.accept_mimetypes.best == "text/event-stream"
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@api.route("/generate_roadmap", methods=["GET", "POST"])
+@api.route("/generate-roadmap", methods=["GET", "POST"])
+def generate_roadmap():
+    github_url, career_goal, preferred_stack = read_request()
+    if not github_url or not career_goal:
+        return jsonify(error="Missing required fields: github_url and career_goal"), 400
+
+    # Revalidation of a cached roadmap is answered from the exact-match cache alone.
+    if request.if_none_match:
+        cached_roadmap = roadmap_app.exact_cache.peek(request_key(career_goal, preferred_stack))
+        etag = roadmap_etag(cached_roadmap) if cached_roadmap is not None else None
+        if etag and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            # Echo the tag as the client holds it: weak for the gzip body, strong for the identity one.
+            response.set_etag(etag, weak=not request.if_none_match.is_strong(etag))
+            return response
+
+    trace = RequestTrace("api", career_goal=career_goal, stack=preferred_stack)
+    client_id = client_key(request.remote_addr, request.headers.get("X-Forwarded-For"))
+    chunks = roadmap_app.generate_roadmap_endpoint(github_url, career_goal, preferred_stack,
+                                                   trace=trace, client_id=client_id)
+    if wants_stream():
+        return stream_roadmap(chunks, trace)
+
+    text = ""
+    for text in chunks:
+        pass
+    if isinstance(text, Rejection):
+        return rejected(text)
+    roadmap = strip_banner(text)
+    if trace.outcome == "error":
+        return jsonify(error=roadmap, outcome=trace.outcome), 502
+
+    response = jsonify(roadmap=roadmap, outcome=trace.outcome, cached=trace.outcome == "cache_hit")
+    # Followers of a degraded or failed generation carry the leader's outcome, not "coalesced".
+    if trace.outcome in roadmap_app.SUCCESS_OUTCOMES:
+        response.set_etag(roadmap_etag(roadmap))
+    else:
+        response.headers["Cache-Control"] = "no-store"  # degraded: a fresh answer is on its way
+    return response
+
+
+def rejected(rejection: Rejection):
+    """429 for a client over its rate, 503 when the queue is full; both with Retry-After."""
+    response = jsonify(error=str(rejection), outcome=rejection.reason, retry_after=rejection.retry_after)
+    response.status_code = 429 if rejection.reason == "rate_limited" else 503
+    response.headers["Retry-After"] = str(rejection.retry_after)
+    return response
+
+
+def stream_roadmap(chunks, trace):
+    # Admission is decided before any roadmap text, so a refusal is still a plain HTTP error.
+    first = next(chunks, "")
+    if isinstance(first, Rejection):
+        return rejected(first)
+
+    def events():
+        sent = ""
+        for text in itertools.chain([first], chunks):
+            if isinstance(text, QueuePosition):
+                yield sse("queued", {"position": text.position})
+                continue
+            text = strip_banner(text)
+            if text.startswith(sent):
+                yield sse("chunk", {"delta": text[len(sent):]})
+            else:
+                yield sse("chunk", {"text": text})
+            sent = text
+        done = {"outcome": trace.outcome, "cached": trace.outcome == "cache_hit"}
+        if trace.outcome in roadmap_app.SUCCESS_OUTCOMES:
+            done["etag"] = roadmap_etag(sent)
+        yield sse("done", done)
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let a reverse proxy hold back chunks
+    return response
+
+
+@api.route("/health")
+def health():
+    return jsonify(status="ok", circuit=roadmap_app.llm_breaker.state)
+
+
+@api.after_request
+def compress(response):
+    """Gzips buffered responses for clients that accept it; streams are left alone."""
+    if "ETag" in response.headers:
+        response.vary.add("Accept-Encoding")  # caches must not hand a gzip body to an identity client
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code == 304 or "Content-Encoding" in response.headers
+            or "gzip" not in request.headers.get("Accept-Encoding", "")):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The gzip bytes differ from the identity ones, so they can't share a strong validator.
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def start_background_services():
+    """Metrics server and optional cache warm-up, once per serving process."""
+    start_metrics_server(int(os.getenv("METRICS_PORT", "8000")), addr=os.getenv("METRICS_ADDR", "127.0.0.1"))
+    if os.getenv("WARMUP_ON_START") == "1":
+        roadmap_app.start_cache_warmup()
+
+
+if __name__ == "__main__":
+    # Werkzeug's server closes the connection after every response; use
+    # gunicorn.conf.py where keep-alive matters.
+    start_background_services()
+    api.run(host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "5000")), threaded=True)
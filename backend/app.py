@@ -1,22 +1,45 @@
-import gradio as gr
-import chromadb
+import asyncio
+import atexit
+import hashlib
 import os
+import tempfile
+import threading
 import uuid
 import time
-import requests
 from dotenv import load_dotenv
-import google.generativeai as genai
+from modules.cache_retention import AccessTracker, RetentionManager, RetentionPolicy
+from modules.admission import AdmissionController, AdmissionRejected, client_key
+from modules.batch import RateLimiter, run_batch_file
+from modules.circuit_breaker import CircuitBreaker, CircuitOpenError
+from modules.exact_cache import ExactMatchCache, request_key
+from modules import knowledge_base
+from modules.github_client import GitHubAPIError, get_github_client, username_from_url
+from modules.llm_client import LLMClient, LLMUnavailable
+from modules.metrics import (
+    TRACE_LOG, PrometheusCacheStats, RequestTrace, live_requests, record_admission_queue, record_circuit_state,
+    record_token_usage, record_upstream_error, record_warm_coverage, start_metrics_server, timed,
+)
+from modules.prompt_builder import build_prompt, summarize_github_repos
+from modules.revalidation import RevalidationQueue
+from modules.single_flight import SingleFlight
+from modules.skill_profile import format_skill_profile, reduce_skill_profile
+from modules.warmup import WARMUP_PROFILE, CacheWarmer, load_request_log, rank_candidates, seed_requests
+from modules.write_behind import WriteBehindQueue
 
 # --- CONFIGURATION ---
 load_dotenv()
 
-# 1. Setup Gemini & Check Models
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    print("⚠️ WARNING: GEMINI_API_KEY not found in .env.")
-else:
-    genai.configure(api_key=api_key)
-    
+# Heavy dependencies (Gemini SDK, ChromaDB + ONNX embeddings, Gradio) are
+# initialized on first use so importing this module stays fast and offline.
+_init_lock = threading.Lock()
+
+# 1. Setup Gemini (lazy). Model discovery is opt-in via LIST_GEMINI_MODELS=1.
+# GEMINI_API_ENDPOINT switches to the REST transport against another host,
+# e.g. the local stand-in in tools/fake_gemini.py.
+_genai = None
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+
+def list_available_models(genai):
     print("\n--------- DEBUG: AVAILABLE MODELS ---------")
     try:
         # This will list what your API key can actually see
@@ -27,212 +50,732 @@ else:
         print(f"⚠️ Error listing models: {e}")
     print("-------------------------------------------\n")
 
-# 2. Setup ChromaDB
+def get_genai():
+    """
+    Imports and configures the Gemini SDK on first use.
+    """
+    global _genai
+    with _init_lock:
+        if _genai is None:
+            import google.generativeai as genai
+
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                print("⚠️ WARNING: GEMINI_API_KEY not found in .env.")
+            else:
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=api_key, transport="rest",
+                                    client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+                else:
+                    genai.configure(api_key=api_key)
+                if os.getenv("LIST_GEMINI_MODELS") == "1":
+                    list_available_models(genai)
+            _genai = genai
+    return _genai
+
+# 2. Setup the Roadmap Store (lazy). ROADMAP_STORE picks the backend:
+# "chroma" (default) embeds Chroma at ROADMAP_DB_PATH for a single process;
+# "sqlite" is a file-locked store under ROADMAP_DB_PATH that every worker on
+# the host can share; "chroma-server" uses the Chroma server at
+# CHROMA_SERVER_URL, shared by workers on any number of hosts.
+# Roadmap texts are kept compressed and deduplicated in a blob store under
+# ROADMAP_BLOB_PATH (default: ROADMAP_DB_PATH; empty keeps them inline, the
+# default for chroma-server since a blob file cannot be shared across hosts).
 current_dir = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(current_dir, "roadmap_db")
-try:
-    chroma_client = chromadb.PersistentClient(path=db_path)
-    collection = chroma_client.get_or_create_collection(name="project_roadmaps")
-    print(f"✅ ChromaDB initialized at: {db_path}")
-except Exception as e:
-    print(f"❌ ChromaDB Init Error: {e}")
+db_path = os.getenv("ROADMAP_DB_PATH", os.path.join(current_dir, "roadmap_db"))
+ROADMAP_STORE = os.getenv("ROADMAP_STORE", "chroma").lower()
+CHROMA_SERVER_URL = os.getenv("CHROMA_SERVER_URL", "")
+ROADMAP_BLOB_PATH = os.getenv("ROADMAP_BLOB_PATH", "" if ROADMAP_STORE == "chroma-server" else db_path)
+_roadmap_store = None
+_roadmap_store_failed = False
+# Squared L2 distance below which a stored roadmap is served as a cache hit.
+SEMANTIC_HIT_DISTANCE = 0.2
+
+# Retention: bounded size/age, LRU eviction by last access, near-duplicate collapsing
+retention_policy = RetentionPolicy.from_env()
+access_tracker = AccessTracker()
+retention_manager = RetentionManager(
+    retention_policy,
+    access_tracker,
+    interval=float(os.getenv("CACHE_COMPACT_INTERVAL", "3600")),
+    # Every worker on the host shares the files below; one of them compacts.
+    lock_path=os.path.join(db_path, "retention.lock"),
+)
+atexit.register(retention_manager.stop)
+
+def get_roadmap_store():
+    """
+    Opens the roadmap store on first use. Returns None if it cannot be opened.
+    """
+    global _roadmap_store, _roadmap_store_failed
+    with _init_lock:
+        if _roadmap_store is None and not _roadmap_store_failed:
+            try:
+                from modules.roadmap_store import open_roadmap_store
+
+                _roadmap_store = open_roadmap_store(ROADMAP_STORE, path=db_path, url=CHROMA_SERVER_URL,
+                                                    blob_path=ROADMAP_BLOB_PATH)
+                retention_manager.start(_roadmap_store)
+                print(f"✅ Roadmap store ({ROADMAP_STORE}) initialized at: {CHROMA_SERVER_URL or db_path}")
+            except Exception as e:
+                _roadmap_store_failed = True
+                print(f"❌ ChromaDB Init Error: {e}")
+    return _roadmap_store
+
+# 3. Setup Exact-Match Cache (checked before any embedding or Chroma work)
+cache_stats = PrometheusCacheStats()
+exact_cache_db = os.getenv("EXACT_CACHE_DB", os.path.join(db_path, "exact_cache.sqlite3"))
+exact_cache = ExactMatchCache(
+    max_entries=int(os.getenv("EXACT_CACHE_SIZE", "256")),
+    db_path=exact_cache_db or None,
+    stats=cache_stats,
+)
+retention_manager.extra_jobs.append(lambda policy: exact_cache.prune(policy.max_entries, policy.max_age))
+retention_manager.flush_jobs.append(exact_cache.flush_access)
+
+# 4. Setup Write-Behind Queue for ChromaDB inserts (batched off the request path)
+def write_roadmap_batch(entries):
+    roadmap_store = get_roadmap_store()
+    if roadmap_store is None:
+        raise RuntimeError("ChromaDB is not available")
+    try:
+        with timed("db_write"):
+            roadmap_store.add_many(entries, collapse_distance=retention_policy.collapse_distance)
+    except Exception:
+        record_upstream_error("chromadb")
+        raise
+
+roadmap_writer = WriteBehindQueue(
+    write_roadmap_batch,
+    max_batch=int(os.getenv("WRITE_BEHIND_BATCH", "32")),
+    max_delay=float(os.getenv("WRITE_BEHIND_DELAY", "0.5")),
+)
+atexit.register(roadmap_writer.close)
+
+# Concurrent cache misses for the same normalized request share one generation.
+roadmap_flights = SingleFlight()
+
+# Outcomes that mean the caller received a real roadmap. "coalesced" is only
+# recorded for followers of a flight whose leader generated one (see follow_outcome).
+SUCCESS_OUTCOMES = ("cache_hit", "generated", "coalesced")
+
+def follow_outcome(trace):
+    """
+    on_follow callback for roadmap_flights: a follower shares its leader's
+    result, so it is "coalesced" only when the leader generated the roadmap and
+    otherwise takes the leader's outcome (degraded, error, ...).
+    """
+    def record(leader_outcome):
+        trace.fields["leader_outcome"] = leader_outcome
+        trace.finish("coalesced" if leader_outcome == "generated" else leader_outcome or "error")
+    return record
+
+# 5. Outbound I/O Limits (GitHub timeouts live on the shared GitHub client)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+CONCURRENCY_LIMIT = int(os.getenv("CONCURRENCY_LIMIT", "256"))
+
+# 6. Setup LLM Client: one long-lived client over the LLM_CHAIN fallback chain
+# (default gemini:gemini-2.0-flash), with per-attempt deadlines, retries and
+# optional hedging (LLM_FIRST_CHUNK_TIMEOUT, LLM_RETRIES, LLM_HEDGE_AFTER).
+# LLM_DEADLINE (default 30s) caps the wait for a first chunk across all of
+# them; past it the request is answered from the stale cache (section 7).
+# Unless LLM_FIRST_CHUNK_TIMEOUT is set, each attempt gets an equal share of it.
+llm_breaker = CircuitBreaker.from_env(on_change=record_circuit_state)
+llm_client = LLMClient.from_env(
+    lambda: get_genai(), gemini_rest=bool(GEMINI_API_ENDPOINT), timeout=LLM_TIMEOUT, breaker=llm_breaker
+)
+
+# 7. Degraded Serving: while the LLM is down (circuit open, or every attempt
+# failed) the closest stored roadmap within STALE_MAX_DISTANCE is served,
+# labeled, and the request is regenerated in the background.
+STALE_MAX_DISTANCE = float(os.getenv("STALE_MAX_DISTANCE", "0.6"))
+
+def regenerate_roadmap(job):
+    result_text = "".join(llm_client.stream(job["prompt"]))
+    save_roadmap(job["cache_key"], job["search_query"], job["query_embedding"],
+                 job["career_goal"], job["preferred_stack"], result_text)
+    print(f"🔄 Regenerated roadmap for '{job['career_goal']}' in the background.")
+
+regenerations = RevalidationQueue(
+    regenerate_roadmap,
+    wait_time=llm_breaker.retry_after,
+    retry_delay=float(os.getenv("REGENERATE_RETRY_DELAY", "30")),
+)
+atexit.register(regenerations.close)
+
+# 8. Cache Warm-Up: pre-generates roadmaps for the knowledge-base roles and the
+# most requested goals in WARMUP_LOG (default: TRACE_LOG), one at a time, at
+# most every WARMUP_INTERVAL seconds and only while fewer than WARMUP_MAX_LIVE
+# live requests are in flight. WARMUP_ON_START=1 runs it when the app starts.
+WARMUP_LOG = os.getenv("WARMUP_LOG", TRACE_LOG)
+WARMUP_LIMIT = int(os.getenv("WARMUP_LIMIT", "50"))
+
+def roadmap_warm_tier(candidate):
+    """
+    The cache tier already holding a warm-up candidate, or None. Semantic hits
+    are copied into the exact-match cache so they are served without an embedding.
+    """
+    if exact_cache.peek(candidate["key"]) is not None:
+        return "exact"
+    roadmap_store = get_roadmap_store()
+    if roadmap_store is None:
+        return None
+    entry = roadmap_store.nearest(roadmap_store.embed(f"{candidate['career_goal']} | {candidate['preferred_stack']}"))
+    if entry is not None and entry["distance"] < SEMANTIC_HIT_DISTANCE:
+        exact_cache.set(candidate["key"], entry["roadmap"])
+        return "semantic"
+    return None
+
+def warm_roadmap(candidate):
+    career_goal, preferred_stack = candidate["career_goal"], candidate["preferred_stack"]
+    search_query = f"{career_goal} | {preferred_stack}"
+    roadmap_store = get_roadmap_store()
+    query_embedding = roadmap_store.embed(search_query) if roadmap_store is not None else None
+    prompt = build_prompt(WARMUP_PROFILE, career_goal, preferred_stack, get_market_context(career_goal))
+    generation = {}
+    result_text = "".join(llm_client.stream(prompt.text, generation))
+    record_token_usage(generation.get("usage"))
+    save_roadmap(candidate["key"], search_query, query_embedding, career_goal, preferred_stack, result_text)
+
+cache_warmer = CacheWarmer(
+    roadmap_warm_tier,
+    warm_roadmap,
+    interval=float(os.getenv("WARMUP_INTERVAL", "5")),
+    live_requests=live_requests,
+    max_live=int(os.getenv("WARMUP_MAX_LIVE", "1")),
+    wait_time=llm_breaker.retry_after,
+    on_report=record_warm_coverage,
+)
+atexit.register(cache_warmer.stop)
+
+def warmup_candidates(log_path=None, limit=None):
+    """Seed roles plus logged requests, ranked by frequency."""
+    log_path = log_path if log_path is not None else WARMUP_LOG
+    logged = load_request_log(log_path) if log_path and os.path.exists(log_path) else []
+    return rank_candidates(seed_requests(), logged, limit=limit or WARMUP_LIMIT)
+
+def start_cache_warmup(log_path=None, limit=None):
+    """Starts warming the caches in the background; False if a warm-up is already running."""
+    return cache_warmer.start(warmup_candidates(log_path, limit))
+
+# 9. Batch Generation: cohort files run through the sync pipeline on
+# BATCH_WORKERS threads. Rows that will reach GitHub and the LLM (not already
+# cached) are paced to BATCH_RATE_PER_MINUTE (0 = no pacing beyond the GitHub
+# client's own rate-limit backoff); repeated goals are served from the caches.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "roadmap_batches"))
+batch_limiter = RateLimiter(float(os.getenv("BATCH_RATE_PER_MINUTE", "0")))
+
+def generate_roadmap_row(row):
+    """Runs one batch row through the sync pipeline; returns its result fields."""
+    career_goal, preferred_stack = row["career_goal"], row["preferred_stack"]
+    if row["github_url"] and career_goal:
+        candidate = {"key": request_key(career_goal, preferred_stack), **row}
+        try:
+            cached = roadmap_warm_tier(candidate)
+        except Exception:
+            cached = None
+        if not cached:
+            batch_limiter.acquire()
+
+    trace = RequestTrace("batch", career_goal=career_goal, stack=preferred_stack)
+    text = ""
+    for text in generate_roadmap_endpoint(row["github_url"], career_goal, preferred_stack, trace=trace):
+        pass
+    if text.startswith(CACHE_HIT_BANNER):
+        text = text[len(CACHE_HIT_BANNER):]
+    ok = trace.outcome in SUCCESS_OUTCOMES
+    return {"status": "ok" if ok else trace.outcome, "outcome": trace.outcome, "roadmap": text}
+
+# 10. Admission Control: cache misses take a token from their client's bucket
+# (ADMISSION_RATE_PER_MINUTE, ADMISSION_BURST) and wait in a fair queue for one
+# of ADMISSION_MAX_CONCURRENT generation slots; size that to what the LLM quota
+# sustains (requests per minute x seconds per generation / 60). Beyond
+# ADMISSION_MAX_QUEUE waiting requests, new ones are shed with a retry-after.
+admission = AdmissionController.from_env(on_change=record_admission_queue)
+
+def admit_generation(client_id, trace):
+    """
+    The `admit` callable for roadmap_flights. It runs only for the request that
+    leads a flight (followers use no slot) and queues it for a generation
+    slot, returning the admission ticket; it raises AdmissionRejected when the
+    client is over its rate or the queue is full. Callers without a client_id
+    (batch, tools) are queued but not rate-limited.
+    """
+    def admit():
+        try:
+            return admission.enqueue(client_id or "local", rate_limited=client_id is not None,
+                                     on_admitted=lambda seconds: trace.observe("admission_wait", seconds))
+        except AdmissionRejected as e:
+            trace.finish(e.reason)
+            raise
+    return admit
+
+# "rest" summarizes the 5 latest repos; "graphql" builds a weighted skill profile
+# from up to GITHUB_GRAPHQL_MAX_REPOS repos in one round trip per page.
+GITHUB_ANALYSIS_MODE = os.getenv("GITHUB_ANALYSIS_MODE", "rest").lower()
+GITHUB_GRAPHQL_MAX_REPOS = int(os.getenv("GITHUB_GRAPHQL_MAX_REPOS", "100"))
+
+# Number of knowledge-base snippets retrieved as market context.
+MARKET_CONTEXT_TOP_K = int(os.getenv("MARKET_CONTEXT_TOP_K", "2"))
 
 # --- REAL ANALYSIS FUNCTIONS ---
 
-def analyze_github_profile(url):
+def github_username(url):
     """
-    Fetches real repository data using the provided GITHUB_TOKEN.
+    Returns (username, None) for a usable profile URL, or (None, message) otherwise.
     """
-    token = os.getenv("GITHUB_TOKEN")
     if not url or "github.com" not in url:
-        return "No valid GitHub URL provided."
+        return None, "No valid GitHub URL provided."
     
-    if not token:
-        return "⚠️ GITHUB_TOKEN missing in .env file. Cannot fetch real data."
+    if not os.getenv("GITHUB_TOKEN"):
+        return None, "⚠️ GITHUB_TOKEN missing in .env file. Cannot fetch real data."
+
+    return username_from_url(url), None
+
+def analyze_github_profile(url):
+    """
+    Fetches real repository data using the provided GITHUB_TOKEN.
+    """
+    username, message = github_username(url)
+    if username is None:
+        return message
 
     try:
-        username = url.rstrip("/").split("/")[-1]
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        
-        api_url = f"https://api.github.com/users/{username}/repos?sort=updated&per_page=5"
-        response = requests.get(api_url, headers=headers)
-        
-        if response.status_code == 200:
-            repos = response.json()
-            repo_summaries = []
-            languages = set()
-            
-            for repo in repos:
-                lang = repo.get('language', 'Unknown')
-                if lang: languages.add(lang)
-                repo_summaries.append(f"- {repo['name']} ({lang}): {repo.get('description', 'No description')}")
-            
-            return f"User: {username}\nTop Languages: {', '.join(languages)}\nRecent Repos:\n" + "\n".join(repo_summaries)
-        else:
-            return f"Failed to fetch GitHub data. Status: {response.status_code}"
-            
+        if GITHUB_ANALYSIS_MODE == "graphql":
+            repos = get_github_client().get_profile_repos(username, max_repos=GITHUB_GRAPHQL_MAX_REPOS)
+            return format_skill_profile(username, reduce_skill_profile(repos))
+        repos = get_github_client().get_repos(username, sort="updated", per_page=5)
+        return summarize_github_repos(username, repos)
+    except GitHubAPIError as e:
+        record_upstream_error("github")
+        return f"Failed to fetch GitHub data. Status: {e.status_code}"
     except Exception as e:
+        record_upstream_error("github")
+        return f"Error analyzing GitHub: {str(e)}"
+
+async def analyze_github_profile_async(url):
+    """
+    Async variant of analyze_github_profile, sharing the GitHub client's cache.
+    """
+    username, message = github_username(url)
+    if username is None:
+        return message
+
+    try:
+        if GITHUB_ANALYSIS_MODE == "graphql":
+            repos = await get_github_client().aget_profile_repos(username, max_repos=GITHUB_GRAPHQL_MAX_REPOS)
+            return format_skill_profile(username, reduce_skill_profile(repos))
+        repos = await get_github_client().aget_repos(username, sort="updated", per_page=5)
+        return summarize_github_repos(username, repos)
+    except GitHubAPIError as e:
+        record_upstream_error("github")
+        return f"Failed to fetch GitHub data. Status: {e.status_code}"
+    except Exception as e:
+        record_upstream_error("github")
         return f"Error analyzing GitHub: {str(e)}"
 
 def get_market_context(goal):
     """
-    Mock logic for market context.
+    Retrieves market context for the goal from the precomputed knowledge-base index,
+    falling back to a generic summary if retrieval is unavailable.
+    """
+    try:
+        return knowledge_base.get_market_context(goal, k=MARKET_CONTEXT_TOP_K)
+    except Exception as e:
+        record_upstream_error("knowledge_base")
+        print(f"Knowledge Base Error: {e}")
+        return f"Current market analysis for '{goal}' indicates high demand for scalable architecture, cloud-native deployments (AWS/Azure), and integration with AI/LLM services."
+
+def lookup_stale_roadmap(query_embedding):
+    """
+    Nearest stored roadmap within the looser STALE_MAX_DISTANCE, or None.
+    """
+    if query_embedding is None:
+        return None
+    try:
+        roadmap_store = get_roadmap_store()
+        entry = roadmap_store.nearest(query_embedding) if roadmap_store is not None else None
+    except Exception as e:
+        record_upstream_error("chromadb")
+        print(f"DB Read Error: {e}")
+        return None
+    if entry is None or entry["distance"] >= STALE_MAX_DISTANCE:
+        return None
+    access_tracker.record(entry["id"])
+    return entry
+
+def serve_degraded(error, prompt, cache_key, search_query, query_embedding, career_goal, preferred_stack):
+    """
+    Queues a background regeneration of this request and returns the closest
+    stored roadmap, clearly labeled, or an unavailability notice if there is none.
     """
-    return f"Current market analysis for '{goal}' indicates high demand for scalable architecture, cloud-native deployments (AWS/Azure), and integration with AI/LLM services."
+    regenerations.submit(cache_key, {
+        "prompt": prompt.text,
+        "cache_key": cache_key,
+        "search_query": search_query,
+        "query_embedding": query_embedding,
+        "career_goal": career_goal,
+        "preferred_stack": preferred_stack,
+    })
+    print(f"⚠️ LLM unavailable ({error}); serving degraded response.")
+    entry = lookup_stale_roadmap(query_embedding)
+    if entry is None:
+        return ("⚠️ The AI service is temporarily unavailable and no similar saved roadmap was found. "
+                "Your roadmap is being generated in the background; please try again in a minute.")
+    return (f"**[Degraded Mode: the AI service is temporarily unavailable. Showing the closest saved roadmap "
+            f"(distance {entry['distance']:.2f}); a fresh one is being generated in the background.]**\n\n"
+            f"{entry['roadmap']}")
+
+def get_cache_stats():
+    """
+    Hit/miss counters for each cache tier (memory, disk, semantic).
+    """
+    return cache_stats.snapshot()
 
 # --- MAIN LOGIC ---
 
-def generate_roadmap_endpoint(github_url, career_goal, preferred_stack):
-    print("Received request for a V10 strategic roadmap.")
-    
-    if not github_url or not career_goal:
-        return "⚠️ Error: Missing required fields: GitHub URL and Career Goal"
+CACHE_HIT_BANNER = "**[Loaded from Database Cache]**\n\n"
 
-    # 1. Check ChromaDB Cache
-    search_query = f"{career_goal} | {preferred_stack}"
+def lookup_cached_roadmap(cache_key, search_query):
+    """
+    Checks the exact-match tiers, then the Chroma semantic cache.
+    Returns (cached_roadmap, query_embedding); the embedding is reused for the insert on a miss.
+    """
+    cached_roadmap = exact_cache.get(cache_key)
+    if cached_roadmap is not None:
+        print("✅ Exact Cache Hit!")
+        return cached_roadmap, None
+
+    query_embedding = None
     try:
-        results = collection.query(query_texts=[search_query], n_results=1)
-        if results['documents'] and results['documents'][0]:
-            distance = results['distances'][0][0]
-            if distance < 0.2:
-                print(f"✅ Cache Hit! Distance: {distance}")
-                return f"**[Loaded from Database Cache]**\n\n{results['documents'][0][0]}"
+        roadmap_store = get_roadmap_store()
+        if roadmap_store is None:
+            return None, None
+        query_embedding = roadmap_store.embed(search_query)
+        entry = roadmap_store.nearest(query_embedding)
+        if entry is not None and entry["distance"] < SEMANTIC_HIT_DISTANCE:
+            print(f"✅ Cache Hit! Distance: {entry['distance']}")
+            cache_stats.record("semantic", True)
+            access_tracker.record(entry["id"])
+            exact_cache.set(cache_key, entry["roadmap"])
+            return entry["roadmap"], query_embedding
+        cache_stats.record("semantic", False)
     except Exception as e:
+        record_upstream_error("chromadb")
         print(f"DB Read Error: {e}")
+    return None, query_embedding
 
-    # 2. RAG Pipeline
-    github_data = analyze_github_profile(github_url)
-    market_context = get_market_context(career_goal)
-
-    # 3. V10 DYNAMIC MENTOR PROMPT
-    prompt = f"""
-    **Situation:**
-    You are an expert AI Tech Mentor and Career Analyst. Your primary task is to generate a project roadmap that is precisely tailored to any specific career goal a user provides.
+def save_roadmap(cache_key, search_query, query_embedding, career_goal, preferred_stack, result_text):
+    """
+    Writes a fully assembled roadmap to the exact-match cache right away and
+    queues the ChromaDB insert for the write-behind worker.
+    """
+    exact_cache.set(cache_key, result_text)
+    if query_embedding is not None:
+        roadmap_writer.submit({
+            "entry_id": str(uuid.uuid4()),
+            "query": search_query,
+            "embedding": query_embedding,
+            "roadmap": result_text,
+            "metadata": {
+                "career_goal": career_goal, 
+                "stack": preferred_stack,
+                "timestamp": str(time.time())
+            },
+        })
 
-    **CRITICAL INSTRUCTIONS (Follow this logic precisely):**
-    1.  **Dynamically Analyze the Career Goal to Define Project Scope:** This is your most important task. Do not rely on a fixed list of jobs. Instead, deconstruct the user's stated career goal into its core technical components and propose a project that logically combines them.
-        - **Example 1:** If the goal is 'Cloud Security Engineer', you should identify 'Cloud' and 'Security' as the core components. The project scope must therefore be about 'Cloud Security Automation', like building a tool to audit AWS security policies.
-        - **Example 2:** If the goal is 'Game Developer with a focus on Physics Engines', you identify 'Game Development' and 'Physics'. The project scope must be 'Game Physics Simulation', not a full-stack web app.
-        - **Example 3:** If the goal is just 'Backend Developer', the project scope should be 'Backend-focused API'.
-        - You MUST state the determined scope in the 'Project Scope' field.
-    2.  **PRIORITY #1 - Career Goal:** The final project idea MUST be directly relevant to the user's stated '[Stated Career Goal]'.
-    3.  **PRIORITY #2 - Preferred Tech Stack:** The 'Tech Stack' section MUST be primarily based on the user's '[Preferred Tech Stack]'. Synthesize it intelligently with their GitHub skills.
-    4.  **PRIORITY #3 - GitHub Analysis:** Use the '[GitHub Analysis]' for supplementary insights. For example, if they have used 'Docker', suggest containerizing the application.
-    5.  **NEGATIVE CONSTRAINT:** You MUST NOT suggest a project related to 'roadmap generation' or 'career coaching'. Propose a completely new, unrelated idea.
-    6.  **FORMATTING:** The entire output MUST be in plain text and follow the specified `Output Format` exactly.
+def generate_roadmap_endpoint(github_url, career_goal, preferred_stack, trace=None, client_id=None):
+    """
+    Streams the roadmap as progressively longer markdown, ending with the full text.
+    While a cache miss waits for a generation slot, QueuePosition messages are
+    yielded; a request refused admission yields a Rejection instead.
+    """
+    print("Received request for a V10 strategic roadmap.")
+    trace = trace or RequestTrace("sync", career_goal=career_goal, stack=preferred_stack)
+    try:
+        if not github_url or not career_goal:
+            trace.finish("invalid")
+            yield "⚠️ Error: Missing required fields: GitHub URL and Career Goal"
+            return
 
-    --- DEVELOPER PROFILE ---
-    [GitHub Analysis of Existing Projects]:
-    {github_data}
+        # 1. Check Caches (exact match, then ChromaDB semantic)
+        cache_key = request_key(career_goal, preferred_stack)
+        search_query = f"{career_goal} | {preferred_stack}"
+        cached_roadmap, query_embedding = trace.call("cache_lookup", lookup_cached_roadmap, cache_key, search_query)
+        if cached_roadmap is not None:
+            trace.finish("cache_hit")
+            yield f"{CACHE_HIT_BANNER}{cached_roadmap}"
+            return
 
-    [Stated Career Goal]:
-    {career_goal}
+        # 2. Generate, sharing the stream with identical requests already in flight;
+        # only the leader waits for a generation slot
+        try:
+            yield from roadmap_flights.stream(
+                cache_key,
+                lambda: generate_roadmap_stream(
+                    github_url, career_goal, preferred_stack, cache_key, search_query, query_embedding, trace
+                ),
+                admit=admit_generation(client_id, trace),
+                outcome=lambda: trace.outcome,
+                on_follow=follow_outcome(trace),
+            )
+        except AdmissionRejected as e:
+            yield e.message()
+    finally:
+        trace.finish("aborted")
 
-    [Preferred Tech Stack (MUST BE PRIORITIZED)]:
-    {preferred_stack if preferred_stack else "Not provided."}
+def generate_roadmap_stream(github_url, career_goal, preferred_stack, cache_key, search_query, query_embedding, trace):
+    """
+    RAG pipeline + LLM generation for a cache miss. Yields the accumulated text.
+    """
+    # RAG Pipeline
+    github_data = trace.call("github_fetch", analyze_github_profile, github_url)
+    market_context = trace.call("market_context", get_market_context, career_goal)
 
-    [Current Market Context for this Goal]:
-    {market_context}
-    --- END PROFILE ---
+    # V10 DYNAMIC MENTOR PROMPT
+    prompt = trace.call("prompt_build", build_prompt, github_data, career_goal, preferred_stack, market_context)
+    trace.prompt(prompt)
 
-    **Task:**
-    Synthesize all the above information according to the priority rules and generate a comprehensive project proposal using the following exact format.
+    result_text = ""
+    generation = {}
+    try:
+        print("🤖 Generating roadmap via the LLM chain...")
+        started = time.perf_counter()
+        for text in llm_client.stream(prompt.text, generation):
+            if not result_text:
+                trace.first_chunk(time.perf_counter() - started)
+            result_text += text
+            yield result_text
+        trace.observe("llm_generation", time.perf_counter() - started)
+        trace.fields["llm"] = generation
+        record_token_usage(generation.get("usage"))
 
-    **Output Format:**
-    Title: [Innovative Project Name Aligned With The Career Goal]
+        # Save to ChromaDB and the exact-match cache, once the full text is assembled
+        trace.call("cache_save", save_roadmap, cache_key, search_query, query_embedding, career_goal, preferred_stack, result_text)
+        trace.finish("generated")
+        print("Strategic roadmap generated successfully.")
 
-    Project Scope: [e.g., Cloud Security Automation, Game Physics Simulation, Backend-focused API]
+    except (LLMUnavailable, CircuitOpenError) as e:
+        # Raised before any text was streamed, so a stale answer can still be served.
+        trace.finish("degraded")
+        yield serve_degraded(e, prompt, cache_key, search_query, query_embedding, career_goal, preferred_stack)
 
-    Existing Methodology:
-    - Current Approach: [Description of a relevant existing system]
-    - Limitations: [Challenges or inefficiencies in the current method]
+    except Exception as e:
+        trace.finish("error")
+        print(f"Generation Error: {e}")
+        yield f"{result_text}\n\nAn error occurred: {str(e)}" if result_text else f"An error occurred: {str(e)}"
 
-    Tech Stack:
-    - [Category 1 e.g., Core Logic]: [Technology based on scope and preferences]
-    - [Category 2 e.g., Infrastructure]: [Technology based on scope and preferences]
-    - [Category 3 e.g., Testing/Deployment]: [Technology based on scope and preferences]
+async def generate_roadmap_endpoint_async(github_url, career_goal, preferred_stack, client_id=None):
+    """
+    Async variant of generate_roadmap_endpoint; blocking Chroma work runs in a thread.
+    """
+    print("Received request for a V10 strategic roadmap.")
+    trace = RequestTrace("async", career_goal=career_goal, stack=preferred_stack)
+    try:
+        if not github_url or not career_goal:
+            trace.finish("invalid")
+            yield "⚠️ Error: Missing required fields: GitHub URL and Career Goal"
+            return
 
-    Innovative Enhancements:
-    - Technological Improvement: [Clear explanation of how this project is an upgrade]
-    - Unique Value Proposition: [What makes this project stand out]
+        # 1. Check Caches (exact match, then ChromaDB semantic)
+        cache_key = request_key(career_goal, preferred_stack)
+        search_query = f"{career_goal} | {preferred_stack}"
+        cached_roadmap, query_embedding = await asyncio.to_thread(
+            trace.call, "cache_lookup", lookup_cached_roadmap, cache_key, search_query
+        )
+        if cached_roadmap is not None:
+            trace.finish("cache_hit")
+            yield f"{CACHE_HIT_BANNER}{cached_roadmap}"
+            return
 
-    Learning Roadmap:
-    - Step 1: [Initial setup relevant to the project scope]
-    - Step 2: [Core functionality implementation]
-    - Step 3: [Advanced feature development]
-    - Step 4: [Testing and deployment relevant to the project scope]
+        # 2. Generate, sharing the stream with identical requests already in flight;
+        # only the leader waits for a generation slot, and only once admitted
+        # does it spend a GitHub call
+        try:
+            async for chunk in roadmap_flights.astream(
+                cache_key,
+                lambda: agenerate_roadmap_stream(
+                    github_url, career_goal, preferred_stack, cache_key, search_query, query_embedding, trace
+                ),
+                admit=admit_generation(client_id, trace),
+                outcome=lambda: trace.outcome,
+                on_follow=follow_outcome(trace),
+            ):
+                yield chunk
+        except AdmissionRejected as e:
+            yield e.message()
+    finally:
+        trace.finish("aborted")
 
-    Enhancements Over Existing Methodology:
-    - [Specific upgrade #1]
-    - [Specific upgrade #2]
-    - [Specific upgrade #3 showing unique innovation]
+async def agenerate_roadmap_stream(github_url, career_goal, preferred_stack, cache_key, search_query, query_embedding, trace):
+    """
+    Async variant of generate_roadmap_stream.
     """
+    # RAG Pipeline (market context retrieval overlaps the GitHub fetch)
+    github_data, market_context = await asyncio.gather(
+        trace.wait("github_fetch", analyze_github_profile_async(github_url)),
+        asyncio.to_thread(trace.call, "market_context", get_market_context, career_goal),
+    )
+
+    # V10 DYNAMIC MENTOR PROMPT
+    prompt = trace.call("prompt_build", build_prompt, github_data, career_goal, preferred_stack, market_context)
+    trace.prompt(prompt)
 
+    result_text = ""
+    generation = {}
     try:
-        # UPDATED: Changed from gemini-1.5-flash to gemini-2.0-flash as per your debug list
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        print("🤖 Generating roadmap via Google Gemini (2.0 Flash)...")
-        response = model.generate_content(prompt)
-        result_text = response.text
-
-        # 4. Save to ChromaDB
-        collection.add(
-            documents=[result_text],
-            metadatas=[{
-                "career_goal": career_goal, 
-                "stack": preferred_stack,
-                "timestamp": str(time.time())
-            }],
-            ids=[str(uuid.uuid4())]
+        print("🤖 Generating roadmap via the LLM chain...")
+        started = time.perf_counter()
+        async for text in llm_client.astream(prompt.text, generation):
+            if not result_text:
+                trace.first_chunk(time.perf_counter() - started)
+            result_text += text
+            yield result_text
+        trace.observe("llm_generation", time.perf_counter() - started)
+        trace.fields["llm"] = generation
+        record_token_usage(generation.get("usage"))
+
+        # Save to ChromaDB and the exact-match cache, once the full text is assembled
+        await asyncio.to_thread(
+            trace.call, "cache_save", save_roadmap,
+            cache_key, search_query, query_embedding, career_goal, preferred_stack, result_text
         )
-        
+        trace.finish("generated")
         print("Strategic roadmap generated successfully.")
-        return result_text
+
+    except (LLMUnavailable, CircuitOpenError) as e:
+        # Raised before any text was streamed, so a stale answer can still be served.
+        trace.finish("degraded")
+        yield await asyncio.to_thread(
+            serve_degraded, e, prompt, cache_key, search_query, query_embedding, career_goal, preferred_stack
+        )
 
     except Exception as e:
+        trace.finish("error")
         print(f"Generation Error: {e}")
-        return f"An error occurred: {str(e)}"
+        yield f"{result_text}\n\nAn error occurred: {str(e)}" if result_text else f"An error occurred: {str(e)}"
 
 # --- GRADIO UI ---
-with gr.Blocks(theme=gr.themes.Soft(primary_hue="cyan"), title="AI Project Roadmap Generator") as demo:
+def generate_roadmap_batch(batch_file, workers=BATCH_WORKERS):
+    """
+    Batch endpoint: runs an uploaded JSONL/CSV file of (github_url, career_goal,
+    preferred_stack) rows and streams progress, then the JSONL results file.
+    Results are kept per input file, so re-uploading an interrupted batch resumes it.
+    """
+    if not batch_file:
+        yield "⚠️ Error: Upload a JSONL or CSV file with github_url, career_goal and preferred_stack columns.", None
+        return
+
+    input_path = batch_file if isinstance(batch_file, str) else batch_file.name
+    with open(input_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    os.makedirs(BATCH_OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(BATCH_OUTPUT_DIR, f"roadmaps-{digest}.jsonl")
+
+    processed = failed = 0
+    try:
+        for result in run_batch_file(input_path, output_path, generate_roadmap_row, workers=int(workers)):
+            processed += 1
+            failed += result["status"] != "ok"
+            yield f"⏳ Processed {processed} rows ({failed} failed)...", None
+    except (ValueError, KeyError) as e:
+        yield f"⚠️ Error: Could not read the batch file: {e}", None
+        return
+    yield f"✅ Batch complete: {processed} rows processed this run ({failed} failed).", output_path
+
+def build_demo():
+    """
+    Builds the Gradio Blocks UI. Gradio is imported here so headless use of this module skips it.
+    """
+    import gradio as gr
+
+    with gr.Blocks(theme=gr.themes.Soft(primary_hue="cyan"), title="AI Project Roadmap Generator") as demo:
     
-    gr.Markdown(
-        """
-        # 🚀 AI Project Roadmap Generator
-        ### Turn your skills and goals into a tangible, high-impact portfolio project.
-        """
-    )
+        gr.Markdown(
+            """
+            # 🚀 AI Project Roadmap Generator
+            ### Turn your skills and goals into a tangible, high-impact portfolio project.
+            """
+        )
     
-    with gr.Row():
-        with gr.Column(scale=1):
-            github_input = gr.Textbox(
-                label="GitHub Profile URL", 
-                placeholder="https://github.com/username",
-                info="We'll analyze your top 5 repos using your GitHub Token."
-            )
-            career_input = gr.Textbox(
-                label="Your Career Goal", 
-                placeholder="e.g. AI Engineer, Full Stack Developer",
-            )
-            stack_input = gr.Textbox(
-                label="Preferred Tech Stack (Optional)", 
-                placeholder="e.g. Python, React, AWS",
-            )
+        with gr.Row():
+            with gr.Column(scale=1):
+                github_input = gr.Textbox(
+                    label="GitHub Profile URL", 
+                    placeholder="https://github.com/username",
+                    info="We'll analyze your top 5 repos using your GitHub Token."
+                )
+                career_input = gr.Textbox(
+                    label="Your Career Goal", 
+                    placeholder="e.g. AI Engineer, Full Stack Developer",
+                )
+                stack_input = gr.Textbox(
+                    label="Preferred Tech Stack (Optional)", 
+                    placeholder="e.g. Python, React, AWS",
+                )
             
-            submit_btn = gr.Button("Generate My Roadmap", variant="primary", size="lg")
+                submit_btn = gr.Button("Generate My Roadmap", variant="primary", size="lg")
     
-    with gr.Row():
-        output_area = gr.Markdown(label="Strategic Roadmap Output")
+        with gr.Row():
+            output_area = gr.Markdown(label="Strategic Roadmap Output")
 
-    submit_btn.click(
-        fn=generate_roadmap_endpoint,
-        inputs=[github_input, career_input, stack_input],
-        outputs=[output_area]
-    )
+        async def generate_roadmap_for_client(github_url, career_goal, preferred_stack, request: gr.Request):
+            # Rate limits and queue fairness are per client address.
+            client_id = client_key(request.client.host if request.client else None,
+                                   request.headers.get("x-forwarded-for"))
+            async for chunk in generate_roadmap_endpoint_async(github_url, career_goal, preferred_stack,
+                                                                client_id=client_id):
+                yield chunk
+
+        submit_btn.click(
+            fn=generate_roadmap_for_client,
+            inputs=[github_input, career_input, stack_input],
+            outputs=[output_area],
+            api_name="generate_roadmap",
+            concurrency_limit=CONCURRENCY_LIMIT
+        )
+
+        with gr.Accordion("Batch Generation (JSONL / CSV)", open=False):
+            with gr.Row():
+                batch_input = gr.File(
+                    label="Cohort File",
+                    file_types=[".jsonl", ".csv"],
+                )
+                batch_workers = gr.Slider(1, 32, value=BATCH_WORKERS, step=1, label="Parallel Workers")
+            batch_btn = gr.Button("Generate Roadmaps for Cohort")
+            batch_status = gr.Markdown()
+            batch_output = gr.File(label="Results (JSONL)")
+
+        # One batch at a time; its rows share the LLM and GitHub with live requests.
+        batch_btn.click(
+            fn=generate_roadmap_batch,
+            inputs=[batch_input, batch_workers],
+            outputs=[batch_status, batch_output],
+            api_name="generate_roadmap_batch",
+            concurrency_limit=1
+        )
+
+    # Async handlers run on the event loop, so the queue can hold hundreds of
+    # in-flight LLM calls instead of being capped by a small thread pool.
+    demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
+    return demo
+
+_demo = None
+
+def __getattr__(name):
+    # Keeps `app.demo` working (e.g. for the `gradio` CLI) without building the UI at import.
+    global _demo
+    if name == "demo":
+        if _demo is None:
+            _demo = build_demo()
+        return _demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    demo.launch(server_name="127.0.0.1", server_port=7860)
\ No newline at end of file
+    if os.getenv("LIST_GEMINI_MODELS") == "1":
+        get_genai()
+    start_metrics_server(int(os.getenv("METRICS_PORT", "8000")), addr=os.getenv("METRICS_ADDR", "127.0.0.1"))
+    if os.getenv("WARMUP_ON_START") == "1":
+        start_cache_warmup()
+    build_demo().launch(server_name="127.0.0.1", server_port=7860)
\ No newline at end of file
@@ -0,0 +1,21 @@
+# Gunicorn settings for the headless API:  gunicorn -c gunicorn.conf.py api:api
+# Threaded workers keep HTTP/1.1 connections alive between requests and let
+# one process serve many SSE streams while they wait on the LLM.
+import os
+
+bind = os.getenv("API_BIND", "0.0.0.0:5000")
+worker_class = "gthread"
+# Each worker is a full copy of the pipeline, its in-memory caches and its
+# metrics server (METRICS_PORT), so scale with threads; more than one worker
+# needs METRICS_PORT=0.
+workers = int(os.getenv("API_WORKERS", "1"))
+threads = int(os.getenv("API_THREADS", "32"))
+keepalive = int(os.getenv("API_KEEPALIVE", "75"))
+# Long enough for a full roadmap generation (LLM_TIMEOUT) to stream out.
+timeout = int(float(os.getenv("LLM_TIMEOUT", "120"))) + 30
+
+
+def post_worker_init(worker):
+    import api
+
+    api.start_background_services()
@@ -0,0 +1,288 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+TRUST_PROXY = os.getenv("ADMISSION_TRUST_PROXY") == "1"
+
+
+class QueuePosition(str):
+    """A progress message yielded while a request waits for a generation slot."""
+
+    def __new__(cls, position: int):
+        text = f"⏳ The generator is busy. You are #{position} in the queue; your roadmap will start shortly."
+        message = super().__new__(cls, text)
+        message.position = position
+        return message
+
+
+class Rejection(str):
+    """The message yielded instead of a roadmap when admission is refused."""
+
+    def __new__(cls, reason: str, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        if reason == "rate_limited":
+            text = f"⚠️ You have requested several new roadmaps in a short time. Please try again in {seconds}s."
+        else:
+            text = f"⚠️ The generator is at capacity right now. Please try again in {seconds}s."
+        message = super().__new__(cls, text)
+        message.reason = reason
+        message.retry_after = seconds
+        return message
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def message(self) -> Rejection:
+        return Rejection(self.reason, self.retry_after)
+
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token; returns 0, or the seconds until one is available (nothing taken)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate else float("inf")
+
+
+class Ticket:
+    """
+    A queued generation. wait() / async_wait() yield QueuePosition messages
+    until it is admitted; release() gives the slot back (or leaves the queue).
+    """
+
+    def __init__(self, controller, client: str, on_admitted=None):
+        self.controller = controller
+        self.client = client
+        self.on_admitted = on_admitted
+        self.enqueued = time.monotonic()
+        self.admitted = False
+        self.admitted_at = None
+        self.released = False
+        self._async_waiters = []
+
+    def _admitted(self):
+        if self.on_admitted:
+            self.on_admitted(self.admitted_at - self.enqueued)
+
+    def wait(self):
+        for position in self.controller.wait(self):
+            yield QueuePosition(position)
+        self._admitted()
+
+    async def async_wait(self):
+        async for position in self.controller.await_admission(self):
+            yield QueuePosition(position)
+        self._admitted()
+
+    def release(self):
+        self.controller.release(self)
+
+
+def client_key(remote_addr: str, forwarded_for: str = None) -> str:
+    """
+    The address a client is rate-limited by. X-Forwarded-For is only trusted
+    with ADMISSION_TRUST_PROXY=1, i.e. behind a proxy that sets it.
+    """
+    if TRUST_PROXY and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return remote_addr or "unknown"
+
+
+class AdmissionController:
+    """
+    Admission in front of LLM generation (cache hits never come here).
+
+    Each client gets a token bucket of `burst` generations refilled at
+    `rate_per_minute`. At most `max_concurrent` generations run at once; the
+    rest wait in a fair queue that admits clients round-robin, so a client
+    with many queued requests cannot push others back. When `max_queue`
+    requests are already waiting, new ones are shed with a retry-after hint
+    estimated from recent generation times.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 64, rate_per_minute: float = 6.0,
+                 burst: int = 3, max_clients: int = 10000, on_change=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_clients = max_clients
+        self.on_change = on_change
+        self._condition = threading.Condition()
+        self._buckets = OrderedDict()
+        self._queues = OrderedDict()  # client -> deque of tickets, in round-robin order
+        self._queued = 0
+        self.active = 0
+        self.service_seconds = 20.0  # moving average of how long a slot is held
+        self.stats = {"admitted": 0, "rate_limited": 0, "shed": 0}
+
+    @classmethod
+    def from_env(cls, on_change=None):
+        return cls(
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "8")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+            rate_per_minute=float(os.getenv("ADMISSION_RATE_PER_MINUTE", "6")),
+            burst=int(os.getenv("ADMISSION_BURST", "3")),
+            on_change=on_change,
+        )
+
+    def _changed(self):
+        # Called with the lock held.
+        if self.on_change:
+            self.on_change(self._queued, self.active)
+
+    def _take_token(self, client: str) -> float:
+        bucket = self._buckets.pop(client, None) or TokenBucket(self.rate_per_minute, self.burst)
+        self._buckets[client] = bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return bucket.take()
+
+    def enqueue(self, client: str, rate_limited: bool = True, on_admitted=None) -> Ticket:
+        """
+        Queues a generation for `client` and returns its ticket. Raises
+        AdmissionRejected when the client is over its rate (unless
+        `rate_limited` is False, for internal callers) or the queue is full.
+        `on_admitted(seconds waited)` is called once the ticket's wait ends.
+        """
+        with self._condition:
+            # Shedding is decided first: a request turned away for capacity costs no rate budget.
+            if self.active >= self.max_concurrent and self._queued >= self.max_queue:
+                self.stats["shed"] += 1
+                raise AdmissionRejected("shed", self.retry_after())
+            if rate_limited and self.rate_per_minute > 0:
+                wait = self._take_token(client)
+                if wait > 0:
+                    self.stats["rate_limited"] += 1
+                    raise AdmissionRejected("rate_limited", wait)
+            ticket = Ticket(self, client, on_admitted)
+            self._queues.setdefault(client, deque()).append(ticket)
+            self._queued += 1
+            self._dispatch()
+            self._changed()
+            return ticket
+
+    def retry_after(self) -> float:
+        """Rough seconds until the current queue has drained."""
+        return (self._queued / self.max_concurrent + 1) * self.service_seconds
+
+    def _dispatch(self):
+        # Called with the lock held: admits queued tickets round-robin while slots are free.
+        admitted = False
+        while self.active < self.max_concurrent and self._queues:
+            client, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            del self._queues[client]
+            if queue:
+                self._queues[client] = queue  # back of the rotation
+            self._queued -= 1
+            self.active += 1
+            ticket.admitted = True
+            ticket.admitted_at = time.monotonic()
+            self.stats["admitted"] += 1
+            admitted = True
+            for loop, event in ticket._async_waiters:
+                loop.call_soon_threadsafe(event.set)
+        if admitted:
+            self._wake()
+
+    def _wake(self):
+        # Called with the lock held: queue positions moved, so waiters re-check them.
+        self._condition.notify_all()
+        for queue in self._queues.values():
+            for ticket in queue:
+                for loop, event in ticket._async_waiters:
+                    loop.call_soon_threadsafe(event.set)
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place of a waiting ticket in admission order (0 once admitted)."""
+        with self._condition:
+            if ticket.admitted:
+                return 0
+            queues = [list(queue) for queue in self._queues.values()]
+            position = 0
+            for depth in range(max(map(len, queues), default=0)):
+                for queue in queues:
+                    if depth < len(queue):
+                        position += 1
+                        if queue[depth] is ticket:
+                            return position
+            return 0
+
+    def wait(self, ticket: Ticket, interval: float = 1.0):
+        """Yields the ticket's queue position while it waits; returns once admitted."""
+        last = None
+        while True:
+            position = self.position(ticket)
+            if ticket.admitted:
+                return
+            if position != last:
+                last = position
+                yield position
+            with self._condition:
+                if not ticket.admitted:
+                    self._condition.wait(interval)
+
+    async def await_admission(self, ticket: Ticket, interval: float = 1.0):
+        """Async variant of wait()."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._condition:
+            ticket._async_waiters.append(waiter)
+        try:
+            last = None
+            while True:
+                event.clear()
+                position = self.position(ticket)
+                if ticket.admitted:
+                    return
+                if position != last:
+                    last = position
+                    yield position
+                try:
+                    await asyncio.wait_for(event.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._condition:
+                ticket._async_waiters.remove(waiter)
+
+    def release(self, ticket: Ticket):
+        """Frees an admitted ticket's slot, or withdraws a ticket still waiting."""
+        with self._condition:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted:
+                self.active -= 1
+                held = time.monotonic() - ticket.admitted_at
+                self.service_seconds = 0.8 * self.service_seconds + 0.2 * held
+            else:
+                queue = self._queues.get(ticket.client)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    self._queued -= 1
+                    if not queue:
+                        del self._queues[ticket.client]
+                self._wake()
+            self._dispatch()
+            self._changed()
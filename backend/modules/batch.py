@@ -0,0 +1,148 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+BATCH_FIELDS = ("github_url", "career_goal", "preferred_stack")
+
+
+def read_batch_rows(path: str) -> list:
+    """
+    Reads batch rows from a .csv file (with a header row) or a JSONL file. Each
+    row is a dict with id, github_url, career_goal and preferred_stack; the id
+    is the row's own "id" field if it has one, else its 1-based position.
+    Raises ValueError naming the line of a JSONL row that is not a JSON object.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            records = []
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"line {number} is not valid JSON: {e}") from e
+                if not isinstance(record, dict):
+                    raise ValueError(f"line {number} is not a JSON object")
+                records.append(record)
+
+    rows = []
+    for position, record in enumerate(records, start=1):
+        row = {"id": str(record.get("id") or position)}
+        for field in BATCH_FIELDS:
+            row[field] = str(record.get(field) or "").strip()
+        rows.append(row)
+    return rows
+
+
+def completed_ids(output_path: str) -> set:
+    """Ids of rows already written to `output_path` with status "ok" (the resume checkpoint)."""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if result.get("status") == "ok":
+                done.add(str(result.get("id")))
+    return done
+
+
+def ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / `per_minute` seconds apart across threads (no limit when 0)."""
+
+    def __init__(self, per_minute: float = 0):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class BatchRunner:
+    """
+    Runs batch rows through `process(row)` on a bounded thread pool and yields
+    each result as soon as it completes. Rows are submitted only as workers
+    free up, so at most `workers` are in flight and no result waits on a slower
+    row ahead of it. `process` returns a result dict; an exception is recorded
+    as a row with status "error".
+    """
+
+    def __init__(self, process, workers: int = 4):
+        self.process = process
+        self.workers = max(1, workers)
+        self.stats = {"submitted": 0, "ok": 0, "failed": 0, "skipped": 0}
+
+    def _run_one(self, row: dict) -> dict:
+        started = time.perf_counter()
+        try:
+            result = self.process(row)
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        return {**row, **result, "seconds": round(time.perf_counter() - started, 3)}
+
+    def run(self, rows, skip_ids=()):
+        skip_ids = set(skip_ids)
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            for row in rows:
+                if row["id"] in skip_ids:
+                    self.stats["skipped"] += 1
+                    continue
+                if len(pending) >= self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._collect(done)
+                pending.add(executor.submit(self._run_one, row))
+                self.stats["submitted"] += 1
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self._collect(done)
+
+    def _collect(self, futures):
+        for future in futures:
+            result = future.result()
+            self.stats["ok" if result["status"] == "ok" else "failed"] += 1
+            yield result
+
+
+def run_batch_file(input_path: str, output_path: str, process, workers: int = 4, resume: bool = True):
+    """
+    Processes `input_path` into the JSONL file `output_path`, appending one line
+    per row as it completes. With `resume`, rows already written with status
+    "ok" are skipped, so an interrupted run continues where it stopped. Yields
+    each result after it has been written.
+    """
+    rows = read_batch_rows(input_path)
+    skip_ids = completed_ids(output_path) if resume else set()
+    runner = BatchRunner(process, workers=workers)
+    print(f"📦 Batch: {len(rows)} rows, {len(skip_ids & {row['id'] for row in rows})} already done, {runner.workers} workers.")
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        if out.tell() and not ends_with_newline(output_path):
+            out.write("\n")  # terminate a line cut short by an interrupted run
+        for result in runner.run(rows, skip_ids):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            yield result
+    print(f"📦 Batch finished: {runner.stats}")
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+BLOB_CODECS = ("zstd", "zlib")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress(data: bytes, codec: str, level: int = None) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("The zstd codec needs the zstandard package")
+        return zstandard.ZstdCompressor(level=level or 9).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, level or 9)
+    raise ValueError(f"Unknown blob codec {codec!r}; expected one of {', '.join(BLOB_CODECS)}")
+
+
+def decompress(blob: bytes) -> bytes:
+    """Decompresses a blob written with either codec (zstd frames are recognized by their magic number)."""
+    if blob[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("Blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+class BlobStore:
+    """
+    Content-addressed store for roadmap texts: each text is compressed (zstd
+    if the zstandard package is installed, else zlib) and kept once under the
+    sha256 of its content in `blobs.sqlite3` under `path`, however many index
+    entries point at it. Like SQLiteRoadmapStore, the file can be shared by
+    every worker process on a host.
+
+    Blobs are never rewritten, so a reader needs no coordination with
+    writers. Unreferenced blobs are removed by prune(), which spares anything
+    stored in the last `grace` seconds (a worker may be about to index it).
+    """
+
+    def __init__(self, path: str, codec: str = None, level: int = None, busy_timeout: float = 30.0):
+        self.path = path
+        self.codec = codec or default_codec()
+        self.level = level
+        compress(b"", self.codec)  # fail on an unusable codec here, not on the first write
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.sqlite_path, timeout=busy_timeout, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "hash TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL)"
+        )
+
+    @property
+    def sqlite_path(self) -> str:
+        return os.path.join(self.path, "blobs.sqlite3")
+
+    def put_many(self, texts: list) -> list:
+        """Stores texts not already present; returns their hashes, in order."""
+        now = time.time()
+        hashes = [content_hash(text) for text in texts]
+        rows = {}
+        for blob_hash, text in zip(hashes, texts):
+            if blob_hash not in rows:
+                data = text.encode("utf-8")
+                rows[blob_hash] = (blob_hash, compress(data, self.codec, self.level), len(data), now)
+        with self._lock:
+            # A text stored again refreshes stored_at, so a concurrent prune() keeps it.
+            self._db.executemany(
+                "INSERT INTO blobs VALUES (?, ?, ?, ?) ON CONFLICT(hash) DO UPDATE SET stored_at = excluded.stored_at",
+                list(rows.values()),
+            )
+        return hashes
+
+    def put(self, text: str) -> str:
+        return self.put_many([text])[0]
+
+    def get(self, blob_hash: str):
+        """The text stored under `blob_hash`, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+        return decompress(row[0]).decode("utf-8") if row else None
+
+    def hashes(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT hash FROM blobs")}
+
+    def prune(self, live: set, grace: float = 3600.0) -> int:
+        """Deletes blobs outside `live` stored more than `grace` seconds ago; returns how many."""
+        cutoff = time.time() - grace
+        with self._lock:
+            stale = [row[0] for row in self._db.execute("SELECT hash FROM blobs WHERE stored_at < ?", (cutoff,))
+                     if row[0] not in live]
+            for start in range(0, len(stale), 500):
+                chunk = stale[start:start + 500]
+                self._db.execute(f"DELETE FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})", chunk)
+        return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs, stored, raw = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {"codec": self.codec, "blobs": blobs, "stored_bytes": stored, "raw_bytes": raw,
+                "ratio": round(raw / stored, 2) if stored else None}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,285 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class RetentionPolicy:
+    """
+    Limits for the roadmap store: `max_entries` and `max_age` (seconds since last
+    use) bound it, and inserts closer than `collapse_distance` to an existing
+    entry replace it instead of adding a near-duplicate.
+    """
+
+    def __init__(self, max_entries: int = 5000, max_age: float = 30 * 86400, collapse_distance: float = 0.05):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.collapse_distance = collapse_distance
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "5000")),
+            max_age=float(os.getenv("CACHE_MAX_AGE_DAYS", "30")) * 86400,
+            collapse_distance=float(os.getenv("CACHE_COLLAPSE_DISTANCE", "0.05")),
+        )
+
+
+class AccessTracker:
+    """
+    Buffers cache hits in memory so the request path never writes to the store;
+    the retention job applies them in bulk.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def record(self, entry_id: str):
+        with self._lock:
+            _, hits = self._pending.get(entry_id, (0.0, 0))
+            self._pending[entry_id] = (time.time(), hits + 1)
+
+    def drain(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
+def last_used(metadata: dict) -> float:
+    """Most recent of last access and creation time; 0 for entries without either."""
+    times = []
+    for field in ("last_access", "timestamp", "created_at"):
+        try:
+            times.append(float(metadata[field]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return max(times, default=0.0)
+
+
+def plan_compaction(entries: list, policy: RetentionPolicy, now: float = None):
+    """
+    Given [(id, metadata)], returns (expired_ids, evicted_ids): entries unused for
+    longer than max_age, then the least recently used beyond max_entries.
+    """
+    now = now or time.time()
+    expired, alive = [], []
+    for entry_id, metadata in entries:
+        used = last_used(metadata)
+        if now - used > policy.max_age:
+            expired.append(entry_id)
+        else:
+            alive.append((used, entry_id))
+
+    alive.sort()
+    overflow = len(alive) - policy.max_entries
+    evicted = [entry_id for _, entry_id in alive[:overflow]] if overflow > 0 else []
+    return expired, evicted
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def clean_hnsw_segments(segment_path: str, sqlite_path: str, dry_run: bool = False) -> dict:
+    """
+    Embedded Chroma keeps each collection's HNSW index in a directory named
+    after its segment id, next to chroma.sqlite3. Deletes never shrink those
+    files and VACUUM does not touch them, so this reports their size and removes
+    directories whose segment is gone from chroma.sqlite3 (deleted collections).
+    """
+    connection = sqlite3.connect(sqlite_path, timeout=30)
+    try:
+        live = {row[0] for row in connection.execute("SELECT id FROM segments")}
+    finally:
+        connection.close()
+    live_bytes = orphan_bytes = 0
+    for name in os.listdir(segment_path):
+        directory = os.path.join(segment_path, name)
+        try:
+            uuid.UUID(name)
+        except ValueError:
+            continue
+        if not os.path.isdir(directory):
+            continue
+        if name in live:
+            live_bytes += directory_size(directory)
+        else:
+            orphan_bytes += directory_size(directory)
+            if not dry_run:
+                shutil.rmtree(directory, ignore_errors=True)
+    return {"hnsw_bytes": live_bytes, "hnsw_orphaned_bytes": orphan_bytes}
+
+
+def vacuum_sqlite(path: str):
+    """Reclaims free pages in a SQLite file after deletes."""
+    if not os.path.exists(path):
+        return
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        connection.execute("VACUUM")
+        # In WAL mode the rewritten pages land in the -wal file; fold them back and truncate it.
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+
+
+def compact(store, policy: RetentionPolicy, tracker: AccessTracker = None,
+            vacuum: bool = True, dry_run: bool = False) -> dict:
+    """
+    Applies buffered accesses, deletes expired and over-capacity entries,
+    prunes roadmap blobs no entry refers to any more (deleted, or replaced by a
+    collapsed near-duplicate) and vacuums the underlying SQLite files. Returns
+    a small report, including the size of an embedded Chroma store's HNSW
+    segment files, which only rebuilding the collection shrinks.
+    """
+    started = time.time()
+    if tracker is not None and not dry_run:
+        store.record_access(tracker.drain())
+
+    entries = list(store.iter_metadata())
+    expired, evicted = plan_compaction(entries, policy, now=started)
+    removed = set(expired + evicted)
+    vacuum_paths = []
+    if not dry_run and removed:
+        store.delete(expired + evicted)
+        vacuum_paths.append(getattr(store, "sqlite_path", None))
+
+    blobs_pruned = 0
+    blobs = getattr(store, "blobs", None)
+    if blobs is not None and not dry_run:
+        blobs_pruned = blobs.prune({metadata.get("roadmap_hash") for entry_id, metadata in entries
+                                    if entry_id not in removed})
+        if blobs_pruned:
+            vacuum_paths.append(blobs.sqlite_path)
+
+    for path in vacuum_paths if vacuum else []:
+        if path:
+            try:
+                vacuum_sqlite(path)
+            except sqlite3.Error as e:
+                print(f"⚠️ Vacuum skipped: {e}")
+
+    segments = {}
+    segment_path = getattr(store, "segment_path", None)
+    if segment_path and os.path.exists(store.sqlite_path):
+        try:
+            segments = clean_hnsw_segments(segment_path, store.sqlite_path, dry_run=dry_run)
+        except sqlite3.Error as e:
+            print(f"⚠️ HNSW segment check skipped: {e}")
+
+    return {
+        "entries_before": len(entries),
+        "expired": len(expired),
+        "evicted": len(evicted),
+        "entries_after": len(entries) - (0 if dry_run else len(removed)),
+        "blobs_pruned": blobs_pruned,
+        **segments,
+        "dry_run": dry_run,
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+class ProcessLock:
+    """
+    Non-blocking exclusive lock on a file, held until release() or until the
+    process exits (the OS drops it then, so a crashed holder never leaves it stuck).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()  # closing the descriptor drops the lock
+            self._file = None
+
+
+class RetentionManager:
+    """
+    Runs compact() on a background thread every `interval` seconds, followed by
+    any `extra_jobs` (callables taking the policy) such as pruning other tiers.
+
+    With `lock_path`, worker processes sharing the store elect one owner through
+    a lock on that file: only the owner compacts and vacuums, the others just
+    apply their buffered accesses, and one of them takes over if the owner exits.
+    `flush_jobs` (no arguments) persist other per-process buffers and run in
+    every process, before compaction and on stop().
+    """
+
+    def __init__(self, policy: RetentionPolicy, tracker: AccessTracker, interval: float = 3600,
+                 extra_jobs: list = None, lock_path: str = None, flush_jobs: list = None):
+        self.policy = policy
+        self.tracker = tracker
+        self.interval = interval
+        self.extra_jobs = extra_jobs or []
+        self.flush_jobs = flush_jobs or []
+        self._lock = ProcessLock(lock_path) if lock_path else None
+        self._store = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, store):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._store = store
+        self._thread = threading.Thread(target=self._run, name="cache-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the job and persists buffered accesses."""
+        self._stop.set()
+        if self._lock is not None:
+            self._lock.release()
+        try:
+            if self._store is not None:
+                self._store.record_access(self.tracker.drain())
+            for job in self.flush_jobs:
+                job()
+        except Exception as e:
+            print(f"⚠️ Could not persist cache access times: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                for job in self.flush_jobs:
+                    job()
+                if self._lock is not None and not self._lock.acquire():
+                    self._store.record_access(self.tracker.drain())
+                    continue
+                report = compact(self._store, self.policy, self.tracker)
+                for job in self.extra_jobs:
+                    job(self.policy)
+                print(f"🧹 Cache compaction: {report}")
+            except Exception as e:
+                print(f"⚠️ Cache compaction failed: {e}")
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"upstream circuit is open, retrying in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Tracks upstream health. After `failure_threshold` consecutive failures the
+    circuit opens and allow() refuses calls for `reset_timeout` seconds; then a
+    single probe is let through (half-open) and its outcome closes or re-opens
+    the circuit. `on_change(state)` is called on every transition.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, on_change=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+        self.stats = {"opened": 0, "rejected": 0}
+
+    @classmethod
+    def from_env(cls, on_change=None):
+        return cls(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            on_change=on_change,
+        )
+
+    def _set_state(self, state: str):
+        # Called with the lock held.
+        if state != self.state:
+            self.state = state
+            if self.on_change:
+                self.on_change(state)
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+                self._probe_started = None
+            if self.state == self.CLOSED:
+                return True
+            # Half-open: one probe at a time; a probe that never reported back expires.
+            if self.state == self.HALF_OPEN and (
+                    self._probe_started is None or now - self._probe_started >= self.reset_timeout):
+                self._probe_started = now
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe through (0 unless open)."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_started = None
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.stats["opened"] += 1
+                    print(f"⚠️ Circuit opened after {self._failures} consecutive upstream failures.")
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                self._set_state(self.OPEN)
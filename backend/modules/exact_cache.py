@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_request(career_goal: str, preferred_stack: str) -> str:
+    """
+    Normalizes a goal/stack pair so trivially different spellings share a cache entry.
+    Whitespace and case are folded and stack items are de-duplicated and sorted.
+    """
+    goal = re.sub(r"\s+", " ", (career_goal or "").strip().lower())
+    stack_items = {
+        re.sub(r"\s+", " ", item.strip().lower())
+        for item in re.split(r"[,;/|]", preferred_stack or "")
+        if item.strip()
+    }
+    return f"{goal} | {', '.join(sorted(stack_items))}"
+
+
+def request_key(career_goal: str, preferred_stack: str) -> str:
+    """Returns the stable hash used as the exact-match cache key."""
+    normalized = normalize_request(career_goal, preferred_stack)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters, one pair per cache tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, tier: str, hit: bool):
+        with self._lock:
+            counter = self._counters.setdefault(tier, {"hits": 0, "misses": 0})
+            counter["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {tier: dict(counter) for tier, counter in self._counters.items()}
+
+
+class ExactMatchCache:
+    """
+    Two-tier exact-match roadmap cache.
+    Tier 1 is a size-bounded in-process LRU; tier 2 is an optional SQLite file
+    that survives restarts. Both are keyed by request_key().
+
+    The SQLite file is shared by every worker process on a host, so it runs in
+    WAL mode and waits up to `busy_timeout` seconds for another writer. A disk
+    tier that stays locked beyond that degrades to a miss on read and a skipped
+    write; it never fails the request.
+
+    Hits on either tier are buffered in memory and written to the disk tier's
+    last_access column by flush_access(), which prune() calls first; ages and
+    eviction order follow last access, not creation.
+    """
+
+    def __init__(self, max_entries: int = 256, db_path: str = None, stats: CacheStats = None,
+                 busy_timeout: float = 5.0):
+        self.max_entries = max_entries
+        self.stats = stats or CacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS roadmaps ("
+                "key TEXT PRIMARY KEY, roadmap TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(roadmaps)")}
+            if "last_access" not in columns:  # files written before access tracking
+                self._db.execute("ALTER TABLE roadmaps ADD COLUMN last_access REAL")
+            self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                if self._db is not None:
+                    self._accessed[key] = time.time()
+                self.stats.record("memory", True)
+                return self._memory[key]
+        self.stats.record("memory", False)
+
+        if self._db is None:
+            return None
+
+        row = self._select(key)
+        self.stats.record("disk", row is not None)
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        with self._lock:
+            self._accessed[key] = time.time()
+        return row[0]
+
+    def peek(self, key: str):
+        """Like get(), without recording a lookup or promoting the entry."""
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        if self._db is None:
+            return None
+        row = self._select(key)
+        return row[0] if row is not None else None
+
+    def set(self, key: str, roadmap: str):
+        self._remember(key, roadmap)
+        if self._db is not None:
+            now = time.time()
+            with self._lock:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO roadmaps (key, roadmap, created_at, last_access) VALUES (?, ?, ?, ?)",
+                        (key, roadmap, now, now),
+                    )
+                    self._db.commit()
+                except sqlite3.OperationalError as e:
+                    self._db.rollback()
+                    print(f"⚠️ Exact cache write skipped: {e}")
+
+    def flush_access(self):
+        """Writes buffered hits to the disk tier; kept for the next flush if it is locked."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            if self._db is None or not accessed:
+                return
+            try:
+                self._db.executemany(
+                    "UPDATE roadmaps SET last_access = MAX(COALESCE(last_access, created_at), ?) WHERE key = ?",
+                    [(at, key) for key, at in accessed.items()],
+                )
+                self._db.commit()
+            except sqlite3.OperationalError as e:
+                self._db.rollback()
+                for key, at in accessed.items():
+                    self._accessed[key] = max(at, self._accessed.get(key, 0.0))
+                print(f"⚠️ Exact cache access times not saved: {e}")
+
+    def prune(self, max_entries: int, max_age: float) -> int:
+        """Drops disk-tier rows unused for `max_age` seconds or beyond the `max_entries` most recently used."""
+        if self._db is None:
+            return 0
+        self.flush_access()
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM roadmaps WHERE COALESCE(last_access, created_at) < ?", (time.time() - max_age,)
+            )
+            removed = cursor.rowcount
+            cursor = self._db.execute(
+                "DELETE FROM roadmaps WHERE key NOT IN "
+                "(SELECT key FROM roadmaps ORDER BY COALESCE(last_access, created_at) DESC LIMIT ?)",
+                (max_entries,),
+            )
+            removed += cursor.rowcount
+            self._db.commit()
+        return removed
+
+    def _select(self, key: str):
+        with self._lock:
+            try:
+                return self._db.execute("SELECT roadmap FROM roadmaps WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Exact cache read skipped: {e}")
+                return None
+
+    def _remember(self, key: str, roadmap: str):
+        with self._lock:
+            self._memory[key] = roadmap
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
@@ -1,6 +1,5 @@
-import os
-import requests
 from dotenv import load_dotenv
+from modules.github_client import GitHubAPIError, get_github_client, username_from_url
 
 # Load environment variables to get access to the new GITHUB_TOKEN
 load_dotenv()
@@ -8,28 +7,15 @@ load_dotenv()
 def analyze_github_profile(github_url: str) -> str:
     """
     Fetches and summarizes public repository data from a GitHub user's profile
-    using an authenticated API request to increase the rate limit.
+    through the shared GitHub client (pooled, cached and ETag-revalidated).
     """
     try:
-        username = github_url.strip().rstrip('/').split('/')[-1]
+        username = username_from_url(github_url)
         if not username:
             raise ValueError("Could not extract a valid username from the provided URL.")
         
-        api_url = f"https://api.github.com/users/{username}/repos"
-        params = {'sort': 'pushed', 'per_page': 7}
-        
-        # --- THIS IS THE KEY UPGRADE ---
-        # We now create an authentication header to send our token.
-        github_token = os.getenv("GITHUB_TOKEN")
-        headers = {
-            'Authorization': f'token {github_token}'
-        } if github_token else {}
-        
-        # We pass the headers with our request.
-        response = requests.get(api_url, params=params, headers=headers)
-        response.raise_for_status()
-        
-        repos = response.json()
+        # The shared client sends GITHUB_TOKEN when it is set, which raises the rate limit.
+        repos = get_github_client().get_repos(username, sort='pushed', per_page=7)
         
         if not repos:
             return "No public repositories found for this user."
@@ -46,8 +32,8 @@ def analyze_github_profile(github_url: str) -> str:
             
         return summary
 
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
+    except GitHubAPIError as e:
+        if e.status_code == 404:
             raise ValueError(f"GitHub user '{username}' not found. Please check the URL.")
         else:
             raise ConnectionError(f"GitHub API error: {e}")
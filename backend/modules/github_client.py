@@ -0,0 +1,340 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://api.github.com"
+
+# One round trip per page: repos with language byte breakdowns, topics and stars.
+PROFILE_QUERY = """
+query($login: String!, $first: Int!, $after: String) {
+  user(login: $login) {
+    repositories(first: $first, after: $after, ownerAffiliations: OWNER, isFork: false,
+                 orderBy: {field: PUSHED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        description
+        stargazerCount
+        pushedAt
+        primaryLanguage { name }
+        languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
+          edges { size node { name } }
+        }
+        repositoryTopics(first: 10) { nodes { topic { name } } }
+      }
+    }
+  }
+}
+"""
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+class GitHubAPIError(ConnectionError):
+    """Raised for non-success GitHub responses; carries the HTTP status code."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _CachedRepos:
+    def __init__(self, repos: list, etag: str, fetched_at: float):
+        self.repos = repos
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+
+class GitHubClient:
+    """
+    Shared GitHub REST client used by both profile analyzers.
+
+    - one pooled requests.Session (sync) and one httpx.AsyncClient (async)
+    - per-username repo cache; entries younger than `ttl` are served without a request
+    - stale entries are revalidated with If-None-Match, and a 304 does not count
+      against the rate limit
+    - when X-RateLimit-Remaining runs low, requests are spaced out until the reset,
+      and stale cached data is served instead of spending the last calls
+    """
+
+    def __init__(self, token: str = None, base_url: str = DEFAULT_API_URL, ttl: float = 900,
+                 timeout: float = 10, max_entries: int = 1024, pool_size: int = 32,
+                 rate_limit_floor: int = 50, max_backoff: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.pool_size = pool_size
+        self.rate_limit_floor = rate_limit_floor
+        self.max_backoff = max_backoff
+
+        self.headers = {"Accept": "application/vnd.github.v3+json"}
+        if token:
+            self.headers["Authorization"] = f"token {token}"
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._async_client = None
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "stale_served": 0}
+
+    # --- Cache bookkeeping ---
+
+    def _cache_key(self, username: str, params: dict) -> tuple:
+        return (username.lower(),) + tuple(sorted(params.items()))
+
+    def _cached(self, key: tuple):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _store(self, key: tuple, entry: _CachedRepos):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    # --- Rate limiting ---
+
+    def _record_rate_limit(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None:
+            self.rate_limit_remaining = int(remaining)
+        if reset is not None:
+            self.rate_limit_reset = float(reset)
+
+    def _backoff_delay(self) -> float:
+        """
+        Seconds to wait before the next request. Zero while the remaining quota is
+        above the floor; otherwise the time to reset spread over the remaining calls.
+        """
+        if self.rate_limit_remaining is None or self.rate_limit_remaining > self.rate_limit_floor:
+            return 0.0
+        until_reset = max(0.0, (self.rate_limit_reset or time.time()) - time.time())
+        if self.rate_limit_remaining == 0:
+            return until_reset
+        return min(self.max_backoff, until_reset / self.rate_limit_remaining)
+
+    # --- Request planning shared by the sync and async paths ---
+
+    def _plan(self, username: str, params: dict):
+        """
+        Returns (key, entry, result). `result` is set when the cache can answer
+        without a network call; otherwise `entry` (possibly stale) is revalidated.
+        """
+        key = self._cache_key(username, params)
+        entry = self._cached(key)
+        if entry is not None and time.time() - entry.fetched_at < self.ttl:
+            self._count("cache_hits")
+            return key, entry, entry.repos
+        if entry is not None and self.rate_limit_remaining == 0 and self._backoff_delay() > 0:
+            self._count("stale_served")
+            return key, entry, entry.repos
+        return key, entry, None
+
+    def _conditional_headers(self, entry) -> dict:
+        if entry is not None and entry.etag:
+            return {"If-None-Match": entry.etag}
+        return {}
+
+    def _handle(self, key: tuple, entry, status_code: int, headers, json_body):
+        self._record_rate_limit(headers)
+        if status_code == 304 and entry is not None:
+            self._count("not_modified")
+            entry.fetched_at = time.time()
+            self._store(key, entry)
+            return entry.repos
+        if status_code == 200:
+            repos = json_body()
+            self._store(key, _CachedRepos(repos, headers.get("ETag"), time.time()))
+            return repos
+        return self._stale(entry, GitHubAPIError(status_code, f"GitHub API returned status {status_code} for {key[0]}"))
+
+    def _stale(self, entry, error: GitHubAPIError):
+        """Serves the cached repos in place of a rate-limited or failed response; re-raises otherwise."""
+        if entry is not None and (error.status_code in (403, 429) or error.status_code >= 500):
+            self._count("stale_served")
+            return entry.repos
+        raise error
+
+    # --- Public API ---
+
+    def get_repos(self, username: str, sort: str = "pushed", per_page: int = 10) -> list:
+        """Returns the user's public repos (GitHub JSON), served from cache when possible."""
+        params = {"sort": sort, "per_page": per_page}
+        key, entry, result = self._plan(username, params)
+        if result is not None:
+            return result
+
+        delay = self._backoff_delay()
+        if delay > 0:
+            time.sleep(min(delay, self.max_backoff))
+
+        self._count("requests")
+        response = self.session.get(
+            f"{self.base_url}/users/{username}/repos",
+            params=params,
+            headers=self._conditional_headers(entry),
+            timeout=self.timeout,
+        )
+        return self._handle(key, entry, response.status_code, response.headers, response.json)
+
+    async def aget_repos(self, username: str, sort: str = "pushed", per_page: int = 10) -> list:
+        """Async variant of get_repos, sharing the same cache and rate-limit state."""
+        params = {"sort": sort, "per_page": per_page}
+        key, entry, result = self._plan(username, params)
+        if result is not None:
+            return result
+
+        delay = self._backoff_delay()
+        if delay > 0:
+            await asyncio.sleep(min(delay, self.max_backoff))
+
+        self._count("requests")
+        response = await self._get_async_client().get(
+            f"{self.base_url}/users/{username}/repos",
+            params=params,
+            headers=self._conditional_headers(entry),
+        )
+        return self._handle(key, entry, response.status_code, response.headers, response.json)
+
+    # --- GraphQL profile mode ---
+
+    def _graphql_page(self, username: str, page_size: int, cursor: str) -> dict:
+        return {"query": PROFILE_QUERY, "variables": {"login": username, "first": page_size, "after": cursor}}
+
+    def _graphql_repositories(self, username: str, status_code: int, headers, json_body) -> dict:
+        self._record_rate_limit(headers)
+        if status_code != 200:
+            raise GitHubAPIError(status_code, f"GitHub GraphQL API returned status {status_code} for {username}")
+        try:
+            body = json_body()
+        except ValueError as e:
+            raise GitHubAPIError(502, f"GitHub GraphQL API returned an unreadable body for {username}: {e}") from e
+        if body.get("errors"):
+            messages = "; ".join(error.get("message", "unknown error") for error in body["errors"])
+            types = {error.get("type") for error in body["errors"]}
+            # GraphQL reports an exhausted quota as a 200 with a RATE_LIMITED error.
+            status_code = 404 if "NOT_FOUND" in types else 429 if "RATE_LIMITED" in types else 502
+            raise GitHubAPIError(status_code, f"GitHub GraphQL error: {messages}")
+        user = (body.get("data") or {}).get("user")
+        if user is None:
+            raise GitHubAPIError(404, f"GitHub user '{username}' not found")
+        return user["repositories"]
+
+    def get_profile_repos(self, username: str, max_repos: int = 100, page_size: int = 50) -> list:
+        """
+        Fetches up to `max_repos` repos with languages, topics and stars through
+        the GraphQL API (one round trip per page of `page_size`). Needs a token.
+        Shares the cache, rate-limit backoff and stale fallback of get_repos.
+        """
+        key, entry, result = self._plan(username, {"graphql": max_repos})
+        if result is not None:
+            return result
+
+        repos, cursor = [], None
+        while len(repos) < max_repos:
+            delay = self._backoff_delay()
+            if delay > 0:
+                time.sleep(min(delay, self.max_backoff))
+
+            self._count("requests")
+            response = self.session.post(
+                f"{self.base_url}/graphql",
+                json=self._graphql_page(username, min(page_size, max_repos - len(repos)), cursor),
+                timeout=self.timeout,
+            )
+            try:
+                page = self._graphql_repositories(username, response.status_code, response.headers, response.json)
+            except GitHubAPIError as e:
+                return self._stale(entry, e)
+            repos.extend(page["nodes"])
+            if not page["pageInfo"]["hasNextPage"]:
+                break
+            cursor = page["pageInfo"]["endCursor"]
+
+        self._store(key, _CachedRepos(repos, None, time.time()))
+        return repos
+
+    async def aget_profile_repos(self, username: str, max_repos: int = 100, page_size: int = 50) -> list:
+        """Async variant of get_profile_repos."""
+        key, entry, result = self._plan(username, {"graphql": max_repos})
+        if result is not None:
+            return result
+
+        repos, cursor = [], None
+        while len(repos) < max_repos:
+            delay = self._backoff_delay()
+            if delay > 0:
+                await asyncio.sleep(min(delay, self.max_backoff))
+
+            self._count("requests")
+            response = await self._get_async_client().post(
+                f"{self.base_url}/graphql",
+                json=self._graphql_page(username, min(page_size, max_repos - len(repos)), cursor),
+            )
+            try:
+                page = self._graphql_repositories(username, response.status_code, response.headers, response.json)
+            except GitHubAPIError as e:
+                return self._stale(entry, e)
+            repos.extend(page["nodes"])
+            if not page["pageInfo"]["hasNextPage"]:
+                break
+            cursor = page["pageInfo"]["endCursor"]
+
+        self._store(key, _CachedRepos(repos, None, time.time()))
+        return repos
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop.
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._async_client
+
+
+def username_from_url(github_url: str) -> str:
+    """Extracts the username from a GitHub profile URL."""
+    return github_url.strip().rstrip("/").split("/")[-1]
+
+
+def get_github_client() -> GitHubClient:
+    """
+    Process-wide client configured from the environment
+    (GITHUB_TOKEN, GITHUB_API_URL, GITHUB_CACHE_TTL, GITHUB_TIMEOUT).
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GitHubClient(
+                token=os.getenv("GITHUB_TOKEN"),
+                base_url=os.getenv("GITHUB_API_URL", DEFAULT_API_URL),
+                ttl=float(os.getenv("GITHUB_CACHE_TTL", "900")),
+                timeout=float(os.getenv("GITHUB_TIMEOUT", "10")),
+            )
+        return _default_client
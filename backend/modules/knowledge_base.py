@@ -1,5 +1,10 @@
-import chromadb
-import chromadb.utils.embedding_functions
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
 
 # This dictionary is our expert knowledge. It's the "A" in RAG.
 JOB_ROLES_KNOWLEDGE = {
@@ -11,27 +16,138 @@ JOB_ROLES_KNOWLEDGE = {
     "fullstack": "For Fullstack roles, a mix of frontend and backend skills is required, including a primary web framework, database skills, and deployment knowledge."
 }
 
-# Setup the vector database client
-client = chromadb.Client()
-sentence_transformer_ef = chromadb.utils.embedding_functions.DefaultEmbeddingFunction()
-collection = client.create_collection(
-    name="job_roles_knowledge",
-    embedding_function=sentence_transformer_ef
-)
-
-def setup_knowledge_base():
-    """Loads our expert knowledge into the ChromaDB collection."""
-    print("Setting up the knowledge base with ChromaDB...")
-    ids = list(JOB_ROLES_KNOWLEDGE.keys())
-    documents = list(JOB_ROLES_KNOWLEDGE.values())
-    collection.add(documents=documents, ids=ids)
-    print("Knowledge base setup complete.")
-
-def get_market_context(career_goal: str) -> str:
+INDEX_FORMAT_VERSION = 1
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_DIR = os.getenv("KNOWLEDGE_INDEX_DIR", os.path.join(BACKEND_DIR, "knowledge_index"))
+# Optional JSONL file ({"id": ..., "text": ...} per line) that extends the built-in knowledge.
+CORPUS_PATH = os.getenv("KNOWLEDGE_CORPUS_PATH")
+
+
+class KnowledgeIndex:
+    """
+    In-memory retrieval index: a matrix of L2-normalized document embeddings.
+    Top-k search is a single NumPy matrix-vector product, with no Chroma round trip.
+    """
+
+    def __init__(self, ids: list, documents: list, matrix: np.ndarray, version: str):
+        self.ids = ids
+        self.documents = documents
+        self.matrix = matrix
+        self.version = version
+
+    def search(self, query_vector: np.ndarray, k: int = 1) -> list:
+        """Returns [(id, document, cosine_similarity)] for the k best matches."""
+        if not self.ids:
+            return []
+        scores = self.matrix @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], self.documents[i], float(scores[i])) for i in top]
+
+
+def load_corpus() -> dict:
+    """The built-in JOB_ROLES_KNOWLEDGE plus any snippets from KNOWLEDGE_CORPUS_PATH."""
+    corpus = dict(JOB_ROLES_KNOWLEDGE)
+    if CORPUS_PATH:
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    corpus[str(row["id"])] = row["text"]
+    return corpus
+
+
+def corpus_version(corpus: dict, model_name: str) -> str:
+    """Content hash of the corpus and embedding model; names the on-disk artifact."""
+    digest = hashlib.sha256(f"{INDEX_FORMAT_VERSION}|{model_name}".encode())
+    for doc_id in sorted(corpus):
+        digest.update(f"\0{doc_id}\0{corpus[doc_id]}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _embedding_function():
+    from modules.roadmap_store import get_default_embedding_function
+
+    return get_default_embedding_function()
+
+
+def build_index(corpus: dict, embedding_function, version: str, batch_size: int = 64) -> KnowledgeIndex:
+    ids = sorted(corpus)
+    documents = [corpus[doc_id] for doc_id in ids]
+    vectors = []
+    for start in range(0, len(documents), batch_size):
+        vectors.extend(embedding_function(documents[start:start + batch_size]))
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32)) if vectors else np.empty((0, 0), np.float32)
+    return KnowledgeIndex(ids, documents, matrix, version)
+
+
+def save_index(index: KnowledgeIndex, directory: str = INDEX_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"index-{index.version}.npz")
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, ids=np.array(index.ids), documents=np.array(index.documents), matrix=index.matrix)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_index(version: str, directory: str = INDEX_DIR):
+    path = os.path.join(directory, f"index-{version}.npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return KnowledgeIndex([str(x) for x in data["ids"]], [str(x) for x in data["documents"]], data["matrix"], version)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def setup_knowledge_base(rebuild: bool = False) -> KnowledgeIndex:
+    """
+    Loads the precomputed index for the current corpus, building and saving it
+    only when no artifact for this corpus version exists. Safe to call repeatedly.
+    """
+    global _index
+    with _index_lock:
+        corpus = load_corpus()
+        embedding_function = _embedding_function()
+        model_name = getattr(embedding_function, "MODEL_NAME", type(embedding_function).__name__)
+        version = corpus_version(corpus, model_name)
+        if _index is not None and _index.version == version and not rebuild:
+            return _index
+
+        index = None if rebuild else load_index(version)
+        if index is None:
+            print("Setting up the knowledge base index...")
+            index = build_index(corpus, embedding_function, version)
+            save_index(index)
+            print(f"Knowledge base index {version} built ({len(index.ids)} documents).")
+        _index = index
+        _embed_query.cache_clear()
+        return _index
+
+
+@functools.lru_cache(maxsize=4096)
+def _embed_query(text: str) -> np.ndarray:
+    vector = np.asarray(_embedding_function()([text])[0], dtype=np.float32)
+    return _normalize(vector)
+
+
+def search_knowledge(query: str, k: int = 1) -> list:
+    """Top-k [(id, document, score)] for a query; query embeddings are memoized."""
+    index = _index or setup_knowledge_base()
+    return index.search(_embed_query(" ".join(query.lower().split())), k)
+
+
+def get_market_context(career_goal: str, k: int = 1) -> str:
     """Performs a semantic search to find the most relevant job role info."""
-    results = collection.query(query_texts=[career_goal], n_results=1)
-    if not results['documents'][0]:
+    results = search_knowledge(career_goal, k)
+    if not results:
         # Fallback if no results are found
         return "General software engineering principles are always in demand."
-    return results['documents'][0][0]
-
+    return "\n".join(document for _, document, _ in results)
@@ -0,0 +1,547 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from modules.circuit_breaker import CircuitOpenError
+from modules.metrics import record_upstream_error
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Timeout / transport errors that carry no status code: google-api-core and openai,
+# plus the requests / httpx ones that do not subclass the builtin ConnectionError.
+RETRYABLE_NAMES = {
+    "DeadlineExceeded", "ServiceUnavailable", "RetryError", "APITimeoutError", "APIConnectionError",
+    "ConnectionError", "ConnectTimeout", "ReadTimeout", "ConnectError", "ReadError", "RemoteProtocolError",
+}
+
+
+class AttemptTimeout(TimeoutError):
+    """An attempt produced no output before its first-chunk deadline."""
+
+
+class EmptyResponse(ValueError):
+    """A backend finished its stream without any text."""
+
+
+class LLMUnavailable(RuntimeError):
+    """Every backend in the chain failed; `errors` lists (backend, error) per attempt."""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        summary = "; ".join(f"{label}: {error}" for label, error in errors[-3:])
+        super().__init__(f"All LLM backends failed ({len(errors)} attempts). Last errors: {summary}")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, connection failures, throttling and 5xx are worth another attempt.
+    Other OSErrors (a missing file, a permission error) are local and final.
+    """
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_NAMES
+
+
+def _chunk_text(chunk) -> str:
+    # Chunks without text parts (e.g. safety-only chunks) raise ValueError on .text.
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def _gemini_usage(response) -> dict:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt": int(getattr(usage, "prompt_token_count", 0) or 0),
+        "response": int(getattr(usage, "candidates_token_count", 0) or 0),
+    }
+
+
+async def aiter_in_thread(iterator):
+    """
+    Drives a blocking iterator from async code, one next() per worker-thread hop.
+    """
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class GeminiBackend:
+    """
+    One Gemini model, created once and reused. `genai_factory` returns the
+    configured SDK module; `rest` marks the REST transport, whose SDK client has
+    no async support, so astream() drives the sync stream from a thread.
+    """
+
+    def __init__(self, model_name: str, genai_factory, rest: bool = False, timeout: float = 120):
+        self.name = "gemini"
+        self.model_name = model_name
+        self.label = f"gemini:{model_name}"
+        self.genai_factory = genai_factory
+        self.rest = rest
+        self.timeout = timeout
+        self._model = None
+        self._lock = threading.Lock()
+
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self.genai_factory().GenerativeModel(self.model_name)
+        return self._model
+
+    def _request_options(self) -> dict:
+        # The SDK's own retry would silently re-send on 503s for up to a minute; LLMClient retries instead.
+        return {"timeout": self.timeout, "retry": None}
+
+    def stream(self, prompt: str, usage: dict):
+        response = self.model().generate_content(prompt, stream=True, request_options=self._request_options())
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+        usage.update(_gemini_usage(response))
+
+    async def astream(self, prompt: str, usage: dict):
+        if self.rest:
+            async for text in aiter_in_thread(self.stream(prompt, usage)):
+                yield text
+            return
+        response = await self.model().generate_content_async(
+            prompt, stream=True, request_options=self._request_options()
+        )
+        async for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+        usage.update(_gemini_usage(response))
+
+
+class OpenAICompatibleBackend:
+    """
+    A chat model behind an OpenAI-compatible API (OpenRouter, OpenAI, local
+    servers). The openai clients are created on first use and reused; the
+    client's own retries are disabled because LLMClient retries.
+    """
+
+    def __init__(self, name: str, model_name: str, api_key: str, base_url: str = None, timeout: float = 120):
+        self.name = name
+        self.model_name = model_name
+        self.label = f"{name}:{model_name}"
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                      timeout=self.timeout, max_retries=0)
+        return self._client
+
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                from openai import AsyncOpenAI
+
+                self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                                 timeout=self.timeout, max_retries=0)
+        return self._async_client
+
+    def _request(self, prompt: str) -> dict:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+
+    @staticmethod
+    def _consume(chunk, usage: dict) -> str:
+        if getattr(chunk, "usage", None):
+            usage.update(prompt=chunk.usage.prompt_tokens or 0, response=chunk.usage.completion_tokens or 0)
+        if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+            return chunk.choices[0].delta.content
+        return ""
+
+    def stream(self, prompt: str, usage: dict):
+        for chunk in self.client().chat.completions.create(**self._request(prompt)):
+            text = self._consume(chunk, usage)
+            if text:
+                yield text
+
+    async def astream(self, prompt: str, usage: dict):
+        response = await self.async_client().chat.completions.create(**self._request(prompt))
+        async for chunk in response:
+            text = self._consume(chunk, usage)
+            if text:
+                yield text
+
+
+OPENAI_COMPATIBLE_PROVIDERS = {
+    # provider: (API key variable, base URL variable, default base URL)
+    "openrouter": ("OPENROUTER_API_KEY", "OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL", None),
+}
+
+
+def parse_chain(spec: str, genai_factory, gemini_rest: bool = False, timeout: float = 120) -> list:
+    """
+    Builds backends from "provider:model,provider:model" (e.g.
+    "gemini:gemini-2.0-flash,openrouter:deepseek/deepseek-chat"). Providers
+    whose API key is not set are skipped with a warning.
+    """
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        provider, _, model_name = entry.partition(":")
+        if provider == "gemini":
+            backends.append(GeminiBackend(model_name or "gemini-2.0-flash", genai_factory, gemini_rest, timeout))
+        elif provider in OPENAI_COMPATIBLE_PROVIDERS:
+            key_var, url_var, default_url = OPENAI_COMPATIBLE_PROVIDERS[provider]
+            api_key = os.getenv(key_var)
+            if not api_key:
+                print(f"⚠️ WARNING: {key_var} not found in .env, skipping {entry} in LLM_CHAIN.")
+                continue
+            backends.append(OpenAICompatibleBackend(
+                provider, model_name, api_key, os.getenv(url_var, default_url), timeout
+            ))
+        else:
+            raise ValueError(f"Unknown LLM provider in LLM_CHAIN: {provider!r}")
+    return backends
+
+
+class LLMClient:
+    """
+    Long-lived streaming client over a fallback chain of backends.
+
+    Each attempt must produce its first chunk within `first_chunk_timeout`
+    (the backends' own request timeout bounds the rest). Left unset, it is an
+    equal share of `deadline` per planned attempt (30s without a deadline), so
+    a hung backend cannot use up the whole deadline before its retry or the
+    next backend gets a turn. Retryable failures
+    are retried up to `retries` times per backend with jittered exponential
+    backoff, then the next backend is tried. With `hedge_after` set, a second
+    identical attempt is started if the first has produced nothing by then and
+    whichever answers first is streamed (sync attempts wait on a thread pool,
+    async ones on the event loop). Once text has been streamed a failure is
+    final, since it cannot be taken back.
+
+    `deadline` bounds the whole wait for a first chunk across every attempt,
+    backoff and fallback; once it has passed the call fails with LLMUnavailable
+    straight away, so callers can serve a degraded answer instead of waiting
+    out each attempt's own timeout.
+
+    With a `breaker`, calls are refused with CircuitOpenError while it is open,
+    and each call's outcome (first chunk, or failure) is reported to it.
+    """
+
+    def __init__(self, backends: list, retries: int = 1, first_chunk_timeout: float = None,
+                 backoff: float = 0.5, max_backoff: float = 4.0, hedge_after: float = 0, max_workers: int = 64,
+                 breaker=None, deadline: float = 0):
+        if not backends:
+            raise ValueError("LLMClient needs at least one backend")
+        self.backends = backends
+        self.retries = retries
+        if first_chunk_timeout is None:
+            first_chunk_timeout = deadline / (len(backends) * (retries + 1)) if deadline else 30
+        self.first_chunk_timeout = first_chunk_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.breaker = breaker
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {"attempts": 0, "retries": 0, "fallbacks": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls, genai_factory, gemini_rest: bool = False, timeout: float = 120, breaker=None):
+        backends = parse_chain(os.getenv("LLM_CHAIN", "gemini:gemini-2.0-flash"), genai_factory, gemini_rest, timeout)
+        first_chunk_timeout = os.getenv("LLM_FIRST_CHUNK_TIMEOUT")
+        return cls(
+            backends,
+            retries=int(os.getenv("LLM_RETRIES", "1")),
+            first_chunk_timeout=float(first_chunk_timeout) if first_chunk_timeout else None,
+            hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "0")),
+            breaker=breaker,
+            deadline=float(os.getenv("LLM_DEADLINE", "30")),
+        )
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many requests instead of synchronizing them.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _plan(self):
+        """Yields (backend, attempt) in chain order."""
+        for backend in self.backends:
+            for attempt in range(self.retries + 1):
+                yield backend, attempt
+
+    def _call_deadline(self):
+        """The monotonic time this call's first chunk is due by, or None."""
+        return time.monotonic() + self.deadline if self.deadline else None
+
+    def _attempt_deadline(self, started: float, deadline):
+        """When an attempt started at `started` must have produced its first chunk, or None."""
+        limits = [started + self.first_chunk_timeout] if self.first_chunk_timeout else []
+        if deadline is not None:
+            limits.append(deadline)
+        return min(limits) if limits else None
+
+    def _pause(self, backend, attempt: int, deadline, errors: list):
+        """
+        Counts a retry or fallback and returns the delay before it; None
+        (recording why) when the call deadline would pass before it could start.
+        """
+        delay = self._delay(attempt) if attempt else 0.0
+        if deadline is not None and deadline - time.monotonic() <= delay:
+            errors.append((backend.label, AttemptTimeout(f"LLM deadline of {self.deadline}s exceeded")))
+            return None
+        if attempt:
+            self._count("retries")
+        elif backend is not self.backends[0]:
+            self._count("fallbacks")
+        return delay
+
+    def _check_breaker(self):
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.retry_after())
+
+    def _report(self, ok: bool):
+        if self.breaker is not None:
+            (self.breaker.record_success if ok else self.breaker.record_failure)()
+
+    def _exhausted(self, errors: list) -> LLMUnavailable:
+        self._count("failures")
+        self._report(False)
+        return LLMUnavailable(errors)
+
+    def _failed(self, backend, error: BaseException, errors: list) -> bool:
+        """Records a failed attempt; returns True if the same backend may be retried."""
+        errors.append((backend.label, error))
+        record_upstream_error(backend.name)
+        print(f"⚠️ LLM attempt on {backend.label} failed: {type(error).__name__}: {error}")
+        return is_retryable(error)
+
+    # --- Sync ---
+
+    def _start(self, backend, prompt: str):
+        """Starts one attempt and waits for its first chunk; returns (stream, first, usage)."""
+        usage = {}
+        stream = backend.stream(prompt, usage)
+        self._count("attempts")
+        try:
+            first = next(stream)
+        except StopIteration:
+            raise EmptyResponse(f"{backend.label} returned an empty response") from None
+        return stream, first, usage
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-attempt")
+        return self._executor
+
+    @staticmethod
+    def _discard(future):
+        # A losing or timed-out attempt keeps its worker until the backend answers
+        # or its own timeout fires; its stream is closed once it does.
+        def close(done):
+            if not done.cancelled() and done.exception() is None:
+                done.result()[0].close()
+        future.add_done_callback(close)
+
+    def _hedged(self, backend, prompt: str, deadline=None):
+        """
+        _start() under the first-chunk and call deadlines, plus a second attempt
+        if the first is still silent after `hedge_after`. Runs on the thread pool.
+        """
+        if not self.first_chunk_timeout and not self.hedge_after and deadline is None:
+            return self._start(backend, prompt)
+        pool = self._pool()
+        started = time.monotonic()
+        primary = pool.submit(self._start, backend, prompt)
+        attempts = {primary: started}
+        hedged = False
+        error = None
+        try:
+            while attempts:
+                now = time.monotonic()
+                limits = [self._attempt_deadline(start, deadline) for start in attempts.values()]
+                deadlines = [limit for limit in limits if limit is not None]
+                if self.hedge_after and not hedged:
+                    deadlines.append(started + self.hedge_after)
+                timeout = max(0.0, min(deadlines) - now) if deadlines else None
+                done, _ = wait(list(attempts), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del attempts[future]
+                    if future.exception() is None:
+                        if future is not primary:
+                            self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+
+                now = time.monotonic()
+                for future, start in list(attempts.items()):
+                    limit = self._attempt_deadline(start, deadline)
+                    if limit is not None and now >= limit:
+                        del attempts[future]
+                        self._discard(future)
+                        error = AttemptTimeout(f"no output within {limit - start:.1f}s")
+                if (self.hedge_after and not hedged and attempts and now - started >= self.hedge_after
+                        and (deadline is None or now < deadline)):
+                    hedged = True
+                    self._count("hedges")
+                    attempts[pool.submit(self._start, backend, prompt)] = now
+            raise error
+        finally:
+            for future in attempts:
+                self._discard(future)
+
+    def stream(self, prompt: str, info: dict = None):
+        """
+        Yields text chunks from the first backend that answers. `info` receives
+        the winning backend, attempt count and token usage.
+        """
+        info = {} if info is None else info
+        self._check_breaker()
+        errors = []
+        skip = None
+        deadline = self._call_deadline()
+        for backend, attempt in self._plan():
+            if backend is skip:
+                continue
+            delay = self._pause(backend, attempt, deadline, errors)
+            if delay is None:
+                break
+            time.sleep(delay)
+            try:
+                stream, first, usage = self._hedged(backend, prompt, deadline)
+            except Exception as e:
+                if not self._failed(backend, e, errors):
+                    skip = backend
+                continue
+
+            info.update(backend=backend.label, attempts=len(errors) + 1)
+            self._report(True)
+            yield first
+            try:
+                yield from stream
+            except Exception:
+                record_upstream_error(backend.name)
+                self._report(False)
+                raise
+            info["usage"] = usage
+            return
+
+        raise self._exhausted(errors)
+
+    # --- Async ---
+
+    async def _astart(self, backend, prompt: str, deadline=None):
+        """Starts one attempt and waits for its first chunk; returns (stream, first, usage)."""
+        usage = {}
+        stream = backend.astream(prompt, usage)
+        self._count("attempts")
+        started = time.monotonic()
+        limit = self._attempt_deadline(started, deadline)
+        try:
+            first = await asyncio.wait_for(anext(stream), None if limit is None else max(0.0, limit - started))
+        except StopAsyncIteration:
+            raise EmptyResponse(f"{backend.label} returned an empty response") from None
+        except asyncio.TimeoutError:
+            await stream.aclose()
+            raise AttemptTimeout(f"no output within {limit - started:.1f}s") from None
+        except BaseException:
+            await stream.aclose()
+            raise
+        return stream, first, usage
+
+    async def _ahedged(self, backend, prompt: str, deadline=None):
+        """_astart(), plus a second attempt if the first is still silent after `hedge_after`."""
+        primary = asyncio.create_task(self._astart(backend, prompt, deadline))
+        if not self.hedge_after:
+            return await primary
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done or (deadline is not None and time.monotonic() >= deadline):
+                return await primary
+            self._count("hedges")
+            hedge = asyncio.create_task(self._astart(backend, prompt, deadline))
+            tasks.add(hedge)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                if winners:
+                    for extra in winners[1:]:
+                        await extra.result()[0].aclose()
+                    if winners[0] is hedge:
+                        self._count("hedge_wins")
+                    return winners[0].result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def astream(self, prompt: str, info: dict = None):
+        """Async variant of stream(), with optional hedging."""
+        info = {} if info is None else info
+        self._check_breaker()
+        errors = []
+        skip = None
+        deadline = self._call_deadline()
+        for backend, attempt in self._plan():
+            if backend is skip:
+                continue
+            delay = self._pause(backend, attempt, deadline, errors)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            try:
+                stream, first, usage = await self._ahedged(backend, prompt, deadline)
+            except Exception as e:
+                if not self._failed(backend, e, errors):
+                    skip = backend
+                continue
+
+            info.update(backend=backend.label, attempts=len(errors) + 1)
+            self._report(True)
+            try:
+                yield first
+                async for text in stream:
+                    yield text
+            except Exception:
+                record_upstream_error(backend.name)
+                self._report(False)
+                raise
+            finally:
+                await stream.aclose()
+            info["usage"] = usage
+            return
+
+        raise self._exhausted(errors)
@@ -0,0 +1,212 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from modules.exact_cache import CacheStats
+
+# Stages of one roadmap request, in pipeline order. "db_write" is timed per
+# write-behind batch rather than per request.
+STAGES = ("cache_lookup", "admission_wait", "github_fetch", "market_context", "prompt_build", "llm_generation",
+          "cache_save", "db_write")
+
+STAGE_SECONDS = Histogram(
+    "roadmap_stage_seconds",
+    "Time spent in each stage of the roadmap pipeline.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+FIRST_CHUNK_SECONDS = Histogram(
+    "roadmap_llm_first_chunk_seconds",
+    "Time from sending the prompt to the first streamed chunk.",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30),
+)
+REQUEST_SECONDS = Histogram(
+    "roadmap_request_seconds",
+    "End-to-end request latency by outcome.",
+    ["outcome"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+REQUESTS = Counter("roadmap_requests_total", "Roadmap requests by outcome.", ["outcome"])
+IN_FLIGHT = Gauge("roadmap_requests_in_flight", "Roadmap requests currently being served.", ["endpoint"])
+CACHE_LOOKUPS = Counter("roadmap_cache_lookups_total", "Cache lookups by tier and result.", ["tier", "result"])
+CACHE_HIT_RATIO = Gauge("roadmap_cache_hit_ratio", "Hit ratio per cache tier since process start.", ["tier"])
+PROMPT_TOKENS = Histogram(
+    "roadmap_prompt_tokens_estimated",
+    "Estimated prompt size in tokens after budgeting.",
+    buckets=(250, 500, 750, 1000, 1250, 1500, 2000, 3000, 4000, 8000),
+)
+LLM_TOKENS = Counter("roadmap_llm_tokens_total", "LLM tokens by kind (prompt, response).", ["kind"])
+UPSTREAM_ERRORS = Counter("roadmap_upstream_errors_total", "Failed calls to upstream services.", ["upstream"])
+CIRCUIT_STATE = Gauge("roadmap_llm_circuit_state", "LLM circuit breaker state (0 closed, 1 half-open, 2 open).")
+ADMISSION_QUEUE = Gauge(
+    "roadmap_admission_generations",
+    "Generations admitted (running) and waiting in the admission queue.",
+    ["state"],
+)
+WARM_COVERAGE = Gauge(
+    "roadmap_cache_warm_coverage",
+    "Share of cache warm-up candidates already cached, by weighting (candidates, requests).",
+    ["weighting"],
+)
+
+TRACE_REQUESTS = os.getenv("TRACE_REQUESTS") == "1"
+TRACE_LOG = os.getenv("TRACE_LOG", "")
+_trace_lock = threading.Lock()
+
+
+class PrometheusCacheStats(CacheStats):
+    """CacheStats that also exports each lookup and the running hit ratio."""
+
+    def record(self, tier: str, hit: bool):
+        super().record(tier, hit)
+        CACHE_LOOKUPS.labels(tier, "hit" if hit else "miss").inc()
+        counter = self.snapshot()[tier]
+        CACHE_HIT_RATIO.labels(tier).set(counter["hits"] / (counter["hits"] + counter["misses"]))
+
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """Observes the duration of the block under `stage`, for work outside a request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_upstream_error(upstream: str):
+    UPSTREAM_ERRORS.labels(upstream).inc()
+
+
+def record_circuit_state(state: str):
+    """on_change hook for CircuitBreaker."""
+    CIRCUIT_STATE.set({"closed": 0, "half_open": 1, "open": 2}[state])
+
+
+def record_admission_queue(queued: int, active: int):
+    """on_change hook for AdmissionController."""
+    ADMISSION_QUEUE.labels("queued").set(queued)
+    ADMISSION_QUEUE.labels("running").set(active)
+
+
+def record_warm_coverage(report: dict):
+    """on_report hook for CacheWarmer."""
+    WARM_COVERAGE.labels("candidates").set(report["coverage"])
+    WARM_COVERAGE.labels("requests").set(report["request_coverage"])
+
+
+def live_requests() -> int:
+    """Roadmap requests currently in flight, across endpoints."""
+    return int(sum(sample.value for metric in IN_FLIGHT.collect() for sample in metric.samples))
+
+
+def record_token_usage(tokens: dict) -> dict:
+    """
+    Counts reported LLM token usage ({"prompt": n, "response": m}); returns it
+    unchanged (empty when the backend reported none).
+    """
+    tokens = tokens or {}
+    for kind, count in tokens.items():
+        if count:
+            LLM_TOKENS.labels(kind).inc(count)
+    return tokens
+
+
+class RequestTrace:
+    """
+    Per-request timing. Each stage() block feeds the stage histogram and, with
+    TRACE_REQUESTS=1, the whole trace is logged as one JSON line on finish()
+    (to TRACE_LOG if set, otherwise stdout).
+    """
+
+    def __init__(self, endpoint: str, **fields):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.fields = fields
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._finished = False
+        self.outcome = None
+        IN_FLIGHT.labels(endpoint).inc()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def call(self, name: str, fn, *args):
+        """Runs fn(*args) as stage `name`; usable with asyncio.to_thread."""
+        with self.stage(name):
+            return fn(*args)
+
+    async def wait(self, name: str, awaitable):
+        """Awaits `awaitable` as stage `name`; cancelled waits are not observed."""
+        start = time.perf_counter()
+        result = await awaitable
+        self.observe(name, time.perf_counter() - start)
+        return result
+
+    def observe(self, name: str, seconds: float):
+        STAGE_SECONDS.labels(name).observe(seconds)
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds, 4)
+
+    def prompt(self, prompt):
+        """Records the budgeted prompt's estimated size (a prompt_builder.Prompt)."""
+        PROMPT_TOKENS.observe(prompt.tokens)
+        self.fields["prompt"] = prompt.report()
+        print(f"📝 Prompt: ~{prompt.tokens} tokens (budget {prompt.budget})"
+              + (f", trimmed {', '.join(prompt.trimmed)}" if prompt.trimmed else ""))
+
+    def first_chunk(self, seconds: float):
+        FIRST_CHUNK_SECONDS.observe(seconds)
+        self.fields["first_chunk_s"] = round(seconds, 4)
+
+    def finish(self, outcome: str):
+        if self._finished:
+            return
+        self._finished = True
+        self.outcome = outcome
+        elapsed = time.perf_counter() - self.started
+        IN_FLIGHT.labels(self.endpoint).dec()
+        REQUESTS.labels(outcome).inc()
+        REQUEST_SECONDS.labels(outcome).observe(elapsed)
+        if TRACE_REQUESTS:
+            write_trace({
+                "trace_id": self.id,
+                "endpoint": self.endpoint,
+                "outcome": outcome,
+                "total_s": round(elapsed, 4),
+                "stages": self.stages,
+                **self.fields,
+            })
+
+
+def write_trace(record: dict):
+    line = json.dumps(record, default=str)
+    with _trace_lock:
+        if TRACE_LOG:
+            with open(TRACE_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        else:
+            print(f"🔎 TRACE {line}")
+
+
+_server_started = False
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1"):
+    """Serves /metrics on its own port (once per process). Port 0 disables it."""
+    global _server_started
+    if port <= 0 or _server_started:
+        return
+    start_http_server(port, addr=addr)
+    _server_started = True
+    print(f"📈 Prometheus metrics on http://{addr}:{port}/metrics")
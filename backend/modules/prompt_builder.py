@@ -0,0 +1,194 @@
+import math
+import os
+import re
+import string
+
+# Rough local estimate (~4 characters per token for English prose and code);
+# good enough to enforce a budget without a tokenizer round trip.
+CHARS_PER_TOKEN = 4
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1400"))
+MAX_INPUT_TOKENS = 60          # career goal / preferred stack (user-typed, single line)
+MIN_MARKET_CONTEXT_TOKENS = 80  # market context is trimmed down to this before the profile is
+MAX_DESCRIPTION_CHARS = 120
+
+# The V10 mentor prompt, compiled once. Placeholders are filled by build_prompt().
+PROMPT_TEMPLATE = string.Template("""**Situation:**
+You are an expert AI Tech Mentor and Career Analyst. Your primary task is to generate a project roadmap that is precisely tailored to any specific career goal a user provides.
+
+**CRITICAL INSTRUCTIONS (Follow this logic precisely):**
+1.  **Dynamically Analyze the Career Goal to Define Project Scope:** This is your most important task. Do not rely on a fixed list of jobs. Instead, deconstruct the user's stated career goal into its core technical components and propose a project that logically combines them.
+    - **Example 1:** If the goal is 'Cloud Security Engineer', you should identify 'Cloud' and 'Security' as the core components. The project scope must therefore be about 'Cloud Security Automation', like building a tool to audit AWS security policies.
+    - **Example 2:** If the goal is 'Game Developer with a focus on Physics Engines', you identify 'Game Development' and 'Physics'. The project scope must be 'Game Physics Simulation', not a full-stack web app.
+    - **Example 3:** If the goal is just 'Backend Developer', the project scope should be 'Backend-focused API'.
+    - You MUST state the determined scope in the 'Project Scope' field.
+2.  **PRIORITY #1 - Career Goal:** The final project idea MUST be directly relevant to the user's stated '[Stated Career Goal]'.
+3.  **PRIORITY #2 - Preferred Tech Stack:** The 'Tech Stack' section MUST be primarily based on the user's '[Preferred Tech Stack]'. Synthesize it intelligently with their GitHub skills.
+4.  **PRIORITY #3 - GitHub Analysis:** Use the '[GitHub Analysis]' for supplementary insights. For example, if they have used 'Docker', suggest containerizing the application.
+5.  **NEGATIVE CONSTRAINT:** You MUST NOT suggest a project related to 'roadmap generation' or 'career coaching'. Propose a completely new, unrelated idea.
+6.  **FORMATTING:** The entire output MUST be in plain text and follow the specified `Output Format` exactly.
+
+--- DEVELOPER PROFILE ---
+[GitHub Analysis of Existing Projects]:
+$github_data
+
+[Stated Career Goal]:
+$career_goal
+
+[Preferred Tech Stack (MUST BE PRIORITIZED)]:
+$preferred_stack
+
+[Current Market Context for this Goal]:
+$market_context
+--- END PROFILE ---
+
+**Task:**
+Synthesize all the above information according to the priority rules and generate a comprehensive project proposal using the following exact format.
+
+**Output Format:**
+Title: [Innovative Project Name Aligned With The Career Goal]
+
+Project Scope: [e.g., Cloud Security Automation, Game Physics Simulation, Backend-focused API]
+
+Existing Methodology:
+- Current Approach: [Description of a relevant existing system]
+- Limitations: [Challenges or inefficiencies in the current method]
+
+Tech Stack:
+- [Category 1 e.g., Core Logic]: [Technology based on scope and preferences]
+- [Category 2 e.g., Infrastructure]: [Technology based on scope and preferences]
+- [Category 3 e.g., Testing/Deployment]: [Technology based on scope and preferences]
+
+Innovative Enhancements:
+- Technological Improvement: [Clear explanation of how this project is an upgrade]
+- Unique Value Proposition: [What makes this project stand out]
+
+Learning Roadmap:
+- Step 1: [Initial setup relevant to the project scope]
+- Step 2: [Core functionality implementation]
+- Step 3: [Advanced feature development]
+- Step 4: [Testing and deployment relevant to the project scope]
+
+Enhancements Over Existing Methodology:
+- [Specific upgrade #1]
+- [Specific upgrade #2]
+- [Specific upgrade #3 showing unique innovation]
+""")
+STATIC_TOKENS = math.ceil(len(PROMPT_TEMPLATE.template.replace("$github_data", "").replace("$career_goal", "")
+                              .replace("$preferred_stack", "").replace("$market_context", "")) / CHARS_PER_TOKEN)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """
+    Cuts `text` to about `tokens` tokens, preferring a line boundary, then a word
+    boundary, and marks the cut with an ellipsis.
+    """
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(limit - 1, 0)]
+    boundary = cut.rfind("\n")
+    if boundary < limit // 2:
+        boundary = cut.rfind(" ")
+    if boundary >= limit // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + "…"
+
+
+def clean_description(description, max_chars: int = MAX_DESCRIPTION_CHARS) -> str:
+    """Single-line repo description without placeholder values, capped at `max_chars`."""
+    if description is None:
+        return ""
+    text = re.sub(r"\s+", " ", str(description)).strip()
+    if text.lower() in ("", "none", "null", "n/a"):
+        return ""
+    if len(text) > max_chars:
+        text = text[:max_chars - 1].rsplit(" ", 1)[0].rstrip(" ,.;:") + "…"
+    return text
+
+
+def summarize_github_repos(username: str, repos: list, max_description: int = MAX_DESCRIPTION_CHARS) -> str:
+    """
+    Compact text profile of REST repo listings: languages in first-seen order,
+    one line per repo, empty fields omitted and repeated descriptions shown once.
+    """
+    languages = []
+    seen_descriptions = set()
+    lines = []
+    for repo in repos:
+        language = repo.get("language")
+        if language and language not in languages:
+            languages.append(language)
+        description = clean_description(repo.get("description"), max_description)
+        if description.lower() in seen_descriptions:
+            description = ""
+        elif description:
+            seen_descriptions.add(description.lower())
+        details = f" ({language})" if language else ""
+        lines.append(f"- {repo['name']}{details}" + (f": {description}" if description else ""))
+
+    return f"User: {username}\nTop Languages: {', '.join(languages) or 'N/A'}\nRecent Repos:\n" + "\n".join(lines)
+
+
+class Prompt:
+    """A rendered prompt with its estimated size, per section, and what was trimmed."""
+
+    def __init__(self, text: str, section_tokens: dict, trimmed: list, budget: int):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.section_tokens = section_tokens
+        self.trimmed = trimmed
+        self.budget = budget
+
+    def __str__(self):
+        return self.text
+
+    def report(self) -> dict:
+        return {"tokens": self.tokens, "budget": self.budget, "sections": self.section_tokens, "trimmed": self.trimmed}
+
+
+def build_prompt(github_data: str, career_goal: str, preferred_stack: str, market_context: str,
+                 budget: int = PROMPT_TOKEN_BUDGET) -> Prompt:
+    """
+    Renders the mentor prompt within `budget` estimated tokens. User inputs are
+    capped first; then market context is trimmed (down to a floor), and the
+    GitHub profile takes whatever room is left.
+    """
+    trimmed = []
+
+    def fit(name, text, tokens):
+        fitted = truncate_to_tokens(text, tokens)
+        if fitted != text:
+            trimmed.append(name)
+        return fitted
+
+    career_goal = fit("career_goal", " ".join(career_goal.split()), MAX_INPUT_TOKENS)
+    preferred_stack = fit("preferred_stack", " ".join((preferred_stack or "").split()), MAX_INPUT_TOKENS) or "Not provided."
+    github_data = (github_data or "").strip()
+    market_context = (market_context or "").strip()
+
+    available = budget - STATIC_TOKENS - estimate_tokens(career_goal) - estimate_tokens(preferred_stack)
+    overflow = estimate_tokens(github_data) + estimate_tokens(market_context) - available
+    if overflow > 0:
+        market_tokens = max(estimate_tokens(market_context) - overflow, MIN_MARKET_CONTEXT_TOKENS)
+        market_context = fit("market_context", market_context, market_tokens)
+        github_data = fit("github_data", github_data, available - estimate_tokens(market_context))
+
+    sections = {
+        "static": STATIC_TOKENS,
+        "github_data": estimate_tokens(github_data),
+        "career_goal": estimate_tokens(career_goal),
+        "preferred_stack": estimate_tokens(preferred_stack),
+        "market_context": estimate_tokens(market_context),
+    }
+    text = PROMPT_TEMPLATE.substitute(
+        github_data=github_data,
+        career_goal=career_goal,
+        preferred_stack=preferred_stack,
+        market_context=market_context,
+    )
+    return Prompt(text, sections, trimmed, budget)
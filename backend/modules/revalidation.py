@@ -0,0 +1,96 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class RevalidationQueue:
+    """
+    Regenerates, in the background, roadmaps that were served stale.
+
+    Jobs are deduplicated by key. A single worker runs `regenerate_fn(job)`
+    once `wait_time()` (e.g. the circuit breaker's retry_after) reports the
+    upstream may be called, and reschedules failed jobs `retry_delay` seconds
+    later, up to `max_attempts` times.
+    """
+
+    def __init__(self, regenerate_fn, wait_time=None, max_pending: int = 100,
+                 retry_delay: float = 30.0, max_attempts: int = 3):
+        self.regenerate_fn = regenerate_fn
+        self.wait_time = wait_time or (lambda: 0.0)
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._condition = threading.Condition()
+        self._heap = []
+        self._keys = set()
+        self._sequence = itertools.count()
+        self._thread = None
+        self._closed = False
+        self.stats = {"submitted": 0, "refreshed": 0, "failed": 0, "dropped": 0}
+
+    def submit(self, key: str, job) -> bool:
+        """Queues a regeneration unless one for `key` is already pending."""
+        with self._condition:
+            if self._closed or key in self._keys:
+                return False
+            if len(self._keys) >= self.max_pending:
+                self.stats["dropped"] += 1
+                return False
+            self._keys.add(key)
+            heapq.heappush(self._heap, (time.monotonic(), next(self._sequence), key, job, 1))
+            self.stats["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="revalidation", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return True
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._keys)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _next_job(self):
+        with self._condition:
+            while not self._closed:
+                delay = self._heap[0][0] - time.monotonic() if self._heap else None
+                if delay is not None and delay <= 0:
+                    return heapq.heappop(self._heap)
+                self._condition.wait(delay)
+            return None
+
+    def _run(self):
+        while True:
+            entry = self._next_job()
+            if entry is None:
+                return
+            _, _, key, job, attempt = entry
+
+            # Don't spend attempts while the upstream is known to be down.
+            wait = self.wait_time()
+            if wait > 0:
+                with self._condition:
+                    heapq.heappush(self._heap, (time.monotonic() + wait, next(self._sequence), key, job, attempt))
+                continue
+
+            try:
+                self.regenerate_fn(job)
+                self.stats["refreshed"] += 1
+                done = True
+            except Exception as e:
+                print(f"⚠️ Background regeneration failed (attempt {attempt}/{self.max_attempts}): {e}")
+                done = attempt >= self.max_attempts
+                if done:
+                    self.stats["failed"] += 1
+
+            with self._condition:
+                if done:
+                    self._keys.discard(key)
+                else:
+                    heapq.heappush(self._heap, (time.monotonic() + self.retry_delay, next(self._sequence),
+                                                key, job, attempt + 1))
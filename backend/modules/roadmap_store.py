@@ -0,0 +1,318 @@
+import functools
+import os
+import time
+from urllib.parse import urlparse
+
+import chromadb
+from chromadb.utils import embedding_functions
+
+
+@functools.lru_cache(maxsize=1)
+def get_default_embedding_function():
+    """One shared ONNX embedding model per process (loaded on first call)."""
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def to_vector(embedding) -> list:
+    """Converts an embedding (numpy array or list) into a plain list of floats."""
+    return [float(x) for x in embedding]
+
+
+def squared_l2(a: list, b: list) -> float:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def collapse_batch(entries: list, ids: list, generations: list, collapse_distance: float):
+    """Points entries closer than `collapse_distance` to an earlier entry of the same batch at its id."""
+    for i in range(1, len(entries)):
+        for j in range(i):
+            if squared_l2(entries[i]["embedding"], entries[j]["embedding"]) < collapse_distance:
+                ids[i] = ids[j]
+                generations[i] = generations[j] + 1
+
+
+class BaseRoadmapStore:
+    """
+    Semantic roadmap cache interface shared by the storage backends. Entries are
+    indexed on the embedding of the short "goal | stack" request query. With a
+    BlobStore (`blobs`), the generated roadmap is kept there, compressed, and
+    the index entry only carries its hash ("roadmap_hash"); without one it
+    travels along as metadata. Distances are squared L2.
+
+    Backends implement nearest, add_many, record_access, iter_metadata, delete,
+    count and migrate_roadmaps; `sqlite_path` names a SQLite file to vacuum
+    after compaction, if any, and `segment_path` a directory of Chroma HNSW
+    segments to check.
+    """
+
+    sqlite_path = None
+    segment_path = None
+
+    def __init__(self, embedding_function=None, blobs=None):
+        self.embedding_function = embedding_function or get_default_embedding_function()
+        self.blobs = blobs
+
+    def embed(self, query: str) -> list:
+        """Embeds a request query once so it can be reused for lookup and insert."""
+        return to_vector(self.embedding_function([query])[0])
+
+    def lookup(self, embedding: list):
+        """
+        Returns (roadmap, distance) for the nearest stored query, or (None, None)
+        when the store is empty.
+        """
+        entry = self.nearest(embedding)
+        if entry is None:
+            return None, None
+        return entry["roadmap"], entry["distance"]
+
+    def _roadmap_fields(self, roadmaps: list) -> list:
+        """
+        The metadata fields that carry each roadmap: its blob hash (clearing any
+        inline copy) when there is a blob store, else the text itself.
+        """
+        if self.blobs is None:
+            return [{"roadmap": roadmap} for roadmap in roadmaps]
+        return [{"roadmap_hash": blob_hash, "roadmap": None} for blob_hash in self.blobs.put_many(roadmaps)]
+
+    def _roadmap(self, metadata: dict, document: str = None):
+        """The roadmap text of an entry, or None if its blob is not available."""
+        if metadata.get("roadmap_hash"):
+            return self.blobs.get(metadata["roadmap_hash"]) if self.blobs is not None else None
+        # Entries written without a blob store keep the roadmap inline; older ones as the document.
+        return metadata.get("roadmap") or document
+
+    def add(self, entry_id: str, query: str, embedding: list, roadmap: str, metadata: dict):
+        """Stores a roadmap under its precomputed query embedding."""
+        self.add_many([{
+            "entry_id": entry_id,
+            "query": query,
+            "embedding": embedding,
+            "roadmap": roadmap,
+            "metadata": metadata,
+        }])
+
+
+class RoadmapStore(BaseRoadmapStore):
+    """
+    Roadmap store backed by the `project_roadmaps` Chroma collection, embedded
+    in this process (PersistentClient at `path`). Only one process may open a
+    given path; see ChromaServerRoadmapStore and SQLiteRoadmapStore for sharing.
+    """
+
+    def __init__(self, path: str, collection_name: str = "project_roadmaps", embedding_function=None, blobs=None):
+        super().__init__(embedding_function, blobs)
+        self.path = path
+        self.client = self._connect()
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=self.embedding_function,
+        )
+
+    def _connect(self):
+        return chromadb.PersistentClient(path=self.path)
+
+    @property
+    def sqlite_path(self) -> str:
+        return os.path.join(self.path, "chroma.sqlite3")
+
+    @property
+    def segment_path(self) -> str:
+        return self.path
+
+    def nearest(self, embedding: list):
+        """
+        Returns the nearest stored entry as a dict (id, roadmap, distance, metadata),
+        or None when the store is empty.
+        """
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=1,
+            include=["documents", "metadatas", "distances"],
+        )
+        if not results['ids'] or not results['ids'][0]:
+            return None
+
+        metadata = results['metadatas'][0][0] or {}
+        roadmap = self._roadmap(metadata, results['documents'][0][0])
+        if roadmap is None:
+            return None
+        return {
+            "id": results['ids'][0][0],
+            "roadmap": roadmap,
+            "distance": results['distances'][0][0],
+            "metadata": metadata,
+        }
+
+    def add_many(self, entries: list, collapse_distance: float = 0.0):
+        """
+        Stores several roadmaps in one upsert. With `collapse_distance`, an entry
+        closer than that to an existing (or earlier batch) entry replaces it
+        instead of adding a near-duplicate; access counters carry over.
+        """
+        now = time.time()
+        ids = [entry["entry_id"] for entry in entries]
+        generations = [1] * len(entries)
+
+        if collapse_distance > 0 and self.collection.count() > 0:
+            results = self.collection.query(
+                query_embeddings=[entry["embedding"] for entry in entries],
+                n_results=1,
+                include=["metadatas", "distances"],
+            )
+            for i, (match_ids, distances, metadatas) in enumerate(
+                    zip(results['ids'], results['distances'], results['metadatas'])):
+                if match_ids and distances[0] < collapse_distance:
+                    ids[i] = match_ids[0]
+                    generations[i] = int((metadatas[0] or {}).get("generations", 1)) + 1
+
+        if collapse_distance > 0:
+            collapse_batch(entries, ids, generations, collapse_distance)
+
+        # Upsert keeps one write per id, so only the latest duplicate within the batch is sent.
+        latest = {entry_id: i for i, entry_id in enumerate(ids)}
+        keep = sorted(latest.values())
+        roadmap_fields = self._roadmap_fields([entries[i]["roadmap"] for i in keep])
+        self.collection.upsert(
+            ids=[ids[i] for i in keep],
+            embeddings=[entries[i]["embedding"] for i in keep],
+            documents=[entries[i]["query"] for i in keep],
+            metadatas=[
+                {**entries[i]["metadata"], **fields, "last_access": now, "generations": generations[i]}
+                for i, fields in zip(keep, roadmap_fields)
+            ],
+        )
+
+    def record_access(self, accesses: dict):
+        """
+        Applies buffered access info ({id: (last_access, hits)}) to entry metadata.
+        """
+        if not accesses:
+            return
+        current = self.collection.get(ids=list(accesses), include=["metadatas"])
+        found, metadatas = [], []
+        for entry_id, metadata in zip(current['ids'], current['metadatas']):
+            last_access, hits = accesses[entry_id]
+            found.append(entry_id)
+            metadatas.append({
+                "last_access": last_access,
+                "hit_count": int((metadata or {}).get("hit_count", 0)) + hits,
+            })
+        if found:
+            self.collection.update(ids=found, metadatas=metadatas)
+
+    def iter_metadata(self, page_size: int = 500):
+        """Yields (id, metadata) for every stored entry, a page at a time."""
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page['ids']:
+                return
+            for entry_id, metadata in zip(page['ids'], page['metadatas']):
+                yield entry_id, metadata or {}
+            offset += len(page['ids'])
+
+    def migrate_roadmaps(self, page_size: int = 100) -> int:
+        """
+        Moves roadmaps stored inline (as metadata, or as the document of older
+        entries) into the blob store. An older entry's document becomes its
+        "goal | stack" query and is re-embedded, since its old embedding is of
+        the roadmap text; other embeddings are kept. Returns how many moved.
+        """
+        if self.blobs is None:
+            raise ValueError("This roadmap store has no blob store to migrate to")
+        moved = offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas", "documents", "embeddings"],
+                                       limit=page_size, offset=offset)
+            if not len(page['ids']):
+                return moved
+            ids, embeddings, documents, roadmaps, rekeyed = [], [], [], [], []
+            for entry_id, metadata, document, embedding in zip(
+                    page['ids'], page['metadatas'], page['documents'], page['embeddings']):
+                metadata = metadata or {}
+                if metadata.get("roadmap_hash") or not (metadata.get("roadmap") or document):
+                    continue
+                ids.append(entry_id)
+                embeddings.append(embedding)
+                if metadata.get("roadmap"):
+                    roadmaps.append(metadata["roadmap"])
+                    documents.append(document)
+                else:
+                    roadmaps.append(document)
+                    documents.append(f"{metadata.get('career_goal', '')} | {metadata.get('stack', '')}")
+                    rekeyed.append(len(ids) - 1)
+            if rekeyed:
+                vectors = self.embedding_function([documents[i] for i in rekeyed])
+                for i, vector in zip(rekeyed, vectors):
+                    embeddings[i] = to_vector(vector)
+            if ids:
+                self.collection.update(ids=ids, embeddings=embeddings, documents=documents,
+                                       metadatas=self._roadmap_fields(roadmaps))
+                moved += len(ids)
+            offset += len(page['ids'])
+
+    def delete(self, ids: list):
+        for start in range(0, len(ids), 500):
+            self.collection.delete(ids=ids[start:start + 500])
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class ChromaServerRoadmapStore(RoadmapStore):
+    """
+    The same collection on a Chroma server (`chroma run`, or the chromadb/chroma
+    image), so any number of workers and hosts share one store. Embeddings are
+    still computed in the calling process.
+    """
+
+    def __init__(self, url: str, collection_name: str = "project_roadmaps", embedding_function=None, blobs=None):
+        self.url = url
+        super().__init__(None, collection_name=collection_name, embedding_function=embedding_function, blobs=blobs)
+
+    def _connect(self):
+        parsed = urlparse(self.url if "://" in self.url else f"http://{self.url}")
+        return chromadb.HttpClient(
+            host=parsed.hostname,
+            port=parsed.port or (443 if parsed.scheme == "https" else 8000),
+            ssl=parsed.scheme == "https",
+        )
+
+    @property
+    def sqlite_path(self):
+        return None  # the server owns its files
+
+    @property
+    def segment_path(self):
+        return None
+
+
+# Storage backends selectable with ROADMAP_STORE.
+STORE_BACKENDS = ("chroma", "chroma-server", "sqlite")
+
+
+def open_roadmap_store(backend: str, path: str = None, url: str = None, embedding_function=None,
+                       blob_path: str = None):
+    """
+    Opens the roadmap store for `backend`: "chroma" (embedded at `path`, one
+    process), "chroma-server" (a Chroma server at `url`) or "sqlite" (a
+    file-locked SQLite file under `path`, shared by the processes on a host).
+    With `blob_path`, roadmap texts go to a compressed BlobStore there.
+    """
+    blobs = None
+    if blob_path:
+        from modules.blob_store import BlobStore
+
+        blobs = BlobStore(blob_path)
+    if backend == "chroma":
+        return RoadmapStore(path=path, embedding_function=embedding_function, blobs=blobs)
+    if backend == "chroma-server":
+        if not url:
+            raise ValueError("ROADMAP_STORE=chroma-server needs CHROMA_SERVER_URL")
+        return ChromaServerRoadmapStore(url, embedding_function=embedding_function, blobs=blobs)
+    if backend == "sqlite":
+        from modules.sqlite_store import SQLiteRoadmapStore
+
+        return SQLiteRoadmapStore(path, embedding_function=embedding_function, blobs=blobs)
+    raise ValueError(f"Unknown roadmap store {backend!r}; expected one of {', '.join(STORE_BACKENDS)}")
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+
+
+class FlightAbandoned(Exception):
+    """The leading caller went away before finishing; a follower should take over."""
+
+
+class Flight:
+    """
+    One in-flight generation. The leader publishes chunks; any number of
+    followers (sync or async, on any thread) replay the same chunks in order.
+    `outcome` is the leader's result label once it has finished.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.outcome = None
+        self._condition = threading.Condition()
+        self._async_waiters = []
+
+    def publish(self, chunk):
+        with self._condition:
+            self.chunks.append(chunk)
+            self._notify()
+
+    def finish(self, error: Exception = None, outcome: str = None):
+        with self._condition:
+            if self.done:
+                return
+            self.done = True
+            self.error = error
+            self.outcome = outcome
+            self._notify()
+
+    def _notify(self):
+        # Called with the condition held.
+        self._condition.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    # --- Leader side ---
+
+    def lead(self, stream, outcome=None):
+        """Drives `stream`, publishing and yielding every chunk; `outcome()` labels the result."""
+        try:
+            for chunk in stream:
+                self.publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            self.finish(FlightAbandoned())
+            raise
+        except BaseException as e:
+            self.finish(e)
+            raise
+        self.finish(outcome=outcome() if outcome else None)
+
+    async def alead(self, stream, outcome=None):
+        """Async variant of lead() for async generators."""
+        try:
+            async for chunk in stream:
+                self.publish(chunk)
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            self.finish(FlightAbandoned())
+            raise
+        except BaseException as e:
+            self.finish(e)
+            raise
+        self.finish(outcome=outcome() if outcome else None)
+
+    # --- Follower side ---
+
+    def follow(self):
+        """Yields the leader's chunks as they arrive; re-raises the leader's error."""
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.chunks) and not self.done:
+                    self._condition.wait()
+                pending = self.chunks[index:]
+                finished, error = self.done, self.error
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    async def afollow(self):
+        """Async variant of follow(); waits without blocking the event loop."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._condition:
+            self._async_waiters.append(waiter)
+        try:
+            index = 0
+            while True:
+                with self._condition:
+                    pending = self.chunks[index:]
+                    finished, error = self.done, self.error
+                    if not pending and not finished:
+                        event.clear()
+                if pending:
+                    for chunk in pending:
+                        yield chunk
+                    index += len(pending)
+                    continue
+                if finished:
+                    if error is not None:
+                        raise error
+                    return
+                await event.wait()
+        finally:
+            with self._condition:
+                self._async_waiters.remove(waiter)
+
+
+def _gated(gate, start_stream):
+    if gate is not None:
+        yield from gate.wait()
+    yield from start_stream()
+
+
+async def _agated(gate, start_stream):
+    if gate is not None:
+        async for message in gate.async_wait():
+            yield message
+    async for chunk in start_stream():
+        yield chunk
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: the first caller for a key becomes the
+    leader and runs it, later callers for the same key follow its output.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.stats = {"leaders": 0, "followers": 0}
+
+    def join(self, key: str):
+        """Returns (flight, is_leader)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not flight.done:
+                self.stats["followers"] += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.stats["leaders"] += 1
+            return flight, True
+
+    def release(self, key: str, flight: Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _admit(self, key: str, flight: Flight, admit):
+        # Leader only. A refused leader abandons the flight, so a follower can try in its place.
+        try:
+            return admit() if admit else None
+        except BaseException:
+            flight.finish(FlightAbandoned())
+            self.release(key, flight)
+            raise
+
+    def stream(self, key: str, start_stream, admit=None, outcome=None, on_follow=None):
+        """
+        Yields the chunks of `start_stream()` for the leader, or the leader's
+        chunks for followers. If the leader is abandoned, a follower takes over.
+
+        `admit()`, if given, is called only by the caller that becomes the
+        leader, before `start_stream()`. It returns a gate (an admission Ticket)
+        whose wait() yields progress messages, published to followers too, until
+        the work may start, and whose release() is called when the flight ends.
+        An exception from `admit()` propagates to that caller.
+
+        `outcome()` is the leader's result label once its stream has ended; each
+        follower passes it to `on_follow(outcome)` after replaying the flight.
+        """
+        while True:
+            flight, is_leader = self.join(key)
+            if is_leader:
+                gate = self._admit(key, flight, admit)
+                try:
+                    yield from flight.lead(_gated(gate, start_stream), outcome)
+                finally:
+                    if gate is not None:
+                        gate.release()
+                    self.release(key, flight)
+                return
+            try:
+                yield from flight.follow()
+            except FlightAbandoned:
+                continue
+            if on_follow:
+                on_follow(flight.outcome)
+            return
+
+    async def astream(self, key: str, start_stream, admit=None, outcome=None, on_follow=None):
+        """
+        Async variant of stream(); `start_stream()` returns an async generator
+        and the gate is awaited with async_wait().
+        """
+        while True:
+            flight, is_leader = self.join(key)
+            if is_leader:
+                gate = self._admit(key, flight, admit)
+                try:
+                    async for chunk in flight.alead(_agated(gate, start_stream), outcome):
+                        yield chunk
+                finally:
+                    if gate is not None:
+                        gate.release()
+                    self.release(key, flight)
+                return
+            try:
+                async for chunk in flight.afollow():
+                    yield chunk
+            except FlightAbandoned:
+                continue
+            if on_follow:
+                on_follow(flight.outcome)
+            return
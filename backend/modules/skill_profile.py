@@ -0,0 +1,74 @@
+import math
+from collections import Counter
+
+from modules.prompt_builder import clean_description
+
+
+def reduce_skill_profile(repos: list, top_languages: int = 8, top_topics: int = 10, top_repos: int = 5) -> dict:
+    """
+    Reduces GraphQL repository nodes to a compact weighted skill profile.
+    Each repo's language bytes are weighted by 1 + log(1 + stars), so popular
+    projects count for more without letting a single viral repo dominate.
+    """
+    language_weight = Counter()
+    topic_count = Counter()
+    total_stars = 0
+
+    for repo in repos:
+        stars = repo.get("stargazerCount") or 0
+        total_stars += stars
+        weight = 1 + math.log1p(stars)
+
+        edges = (repo.get("languages") or {}).get("edges") or []
+        if edges:
+            for edge in edges:
+                language_weight[edge["node"]["name"]] += edge["size"] * weight
+        elif repo.get("primaryLanguage"):
+            language_weight[repo["primaryLanguage"]["name"]] += weight
+
+        for node in (repo.get("repositoryTopics") or {}).get("nodes") or []:
+            topic_count[node["topic"]["name"]] += 1
+
+    total_weight = sum(language_weight.values()) or 1
+    highlights = sorted(repos, key=lambda repo: repo.get("stargazerCount") or 0, reverse=True)[:top_repos]
+
+    return {
+        "repo_count": len(repos),
+        "total_stars": total_stars,
+        "languages": [
+            (name, round(weight / total_weight, 3))
+            for name, weight in language_weight.most_common(top_languages)
+            if weight / total_weight >= 0.01
+        ],
+        "topics": topic_count.most_common(top_topics),
+        "highlights": [
+            {
+                "name": repo.get("name"),
+                "stars": repo.get("stargazerCount") or 0,
+                "language": (repo.get("primaryLanguage") or {}).get("name"),
+                "description": repo.get("description"),
+            }
+            for repo in highlights
+        ],
+    }
+
+
+def format_skill_profile(username: str, profile: dict) -> str:
+    """Renders a skill profile as the short text block used in the prompt."""
+    languages = ", ".join(f"{name} {share:.0%}" for name, share in profile["languages"]) or "N/A"
+    topics = ", ".join(name for name, _ in profile["topics"]) or "N/A"
+    lines = [
+        f"User: {username} ({profile['repo_count']} repos, {profile['total_stars']} stars)",
+        f"Language Mix: {languages}",
+        f"Topics: {topics}",
+        "Notable Repos:",
+    ]
+    seen_descriptions = set()
+    for repo in profile["highlights"]:
+        description = clean_description(repo["description"])
+        if description.lower() in seen_descriptions:
+            description = ""
+        seen_descriptions.add(description.lower())
+        description = f": {description}" if description else ""
+        lines.append(f"- {repo['name']} ({repo['language'] or 'n/a'}, {repo['stars']}★){description}")
+    return "\n".join(lines)
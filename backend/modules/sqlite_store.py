@@ -0,0 +1,224 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from modules.roadmap_store import BaseRoadmapStore, collapse_batch
+
+
+class SQLiteRoadmapStore(BaseRoadmapStore):
+    """
+    Roadmap store in a single SQLite file that every worker process on a host
+    can open at once. SQLite's file locks serialize writers (each write is one
+    BEGIN IMMEDIATE transaction, waiting up to `busy_timeout` seconds) and WAL
+    mode keeps readers from blocking them.
+
+    Each process searches an in-memory NumPy matrix of the stored embeddings,
+    reloaded whenever PRAGMA data_version shows another process committed, so
+    an entry written by one worker is a hit for all of them.
+    """
+
+    def __init__(self, path: str, embedding_function=None, busy_timeout: float = 30.0, blobs=None):
+        super().__init__(embedding_function, blobs)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.sqlite_path, timeout=busy_timeout, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS roadmaps ("
+            "id TEXT PRIMARY KEY, query TEXT NOT NULL, embedding BLOB NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._ids = []
+        self._matrix = None
+        self._norms = None
+        self._version = None
+
+    @property
+    def sqlite_path(self) -> str:
+        return os.path.join(self.path, "roadmaps.sqlite3")
+
+    def _refresh(self):
+        # Called with the lock held. data_version only moves for other
+        # connections' commits, so this process's own writes reset _version.
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version and self._matrix is not None:
+            return
+        rows = self._db.execute("SELECT id, embedding FROM roadmaps").fetchall()
+        self._ids = [row[0] for row in rows]
+        self._matrix = (np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                        if rows else np.empty((0, 0), dtype=np.float32))
+        self._norms = (self._matrix ** 2).sum(axis=1)
+        self._version = version
+
+    def _nearest_rows(self, embeddings: list) -> list:
+        # Called with the lock held: [(index, squared L2 distance)] per embedding.
+        self._refresh()
+        if not self._ids:
+            return [None] * len(embeddings)
+        queries = np.asarray(embeddings, dtype=np.float32)
+        # |m - q|^2 = |m|^2 - 2 m.q + |q|^2, one matrix product for the whole batch
+        distances = self._norms[None, :] - 2 * queries @ self._matrix.T + (queries ** 2).sum(axis=1)[:, None]
+        distances = np.maximum(distances, 0.0)
+        best = distances.argmin(axis=1)
+        return [(int(i), float(distances[row, i])) for row, i in enumerate(best)]
+
+    def _metadata(self, ids: list) -> dict:
+        found = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT id, query, metadata FROM roadmaps WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for entry_id, query, metadata in rows:
+                found[entry_id] = (query, json.loads(metadata))
+        return found
+
+    def nearest(self, embedding: list):
+        """
+        Returns the nearest stored entry as a dict (id, roadmap, distance, metadata),
+        or None when the store is empty.
+        """
+        with self._lock:
+            match = self._nearest_rows([embedding])[0]
+            if match is None:
+                return None
+            entry_id = self._ids[match[0]]
+            row = self._metadata([entry_id]).get(entry_id)
+        if row is None:
+            return None  # deleted by another process since the matrix was loaded
+        query, metadata = row
+        roadmap = self._roadmap(metadata, query)
+        if roadmap is None:
+            return None
+        return {
+            "id": entry_id,
+            "roadmap": roadmap,
+            "distance": match[1],
+            "metadata": metadata,
+        }
+
+    def add_many(self, entries: list, collapse_distance: float = 0.0):
+        """
+        Stores several roadmaps in one transaction. With `collapse_distance`, an
+        entry closer than that to an existing (or earlier batch) entry replaces
+        it instead of adding a near-duplicate; access counters carry over.
+        """
+        now = time.time()
+        ids = [entry["entry_id"] for entry in entries]
+        generations = [1] * len(entries)
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if collapse_distance > 0:
+                    matches = self._nearest_rows([entry["embedding"] for entry in entries])
+                    existing = self._metadata([self._ids[m[0]] for m in matches if m and m[1] < collapse_distance])
+                    for i, match in enumerate(matches):
+                        if match and match[1] < collapse_distance and self._ids[match[0]] in existing:
+                            ids[i] = self._ids[match[0]]
+                            generations[i] = int(existing[ids[i]][1].get("generations", 1)) + 1
+                    collapse_batch(entries, ids, generations, collapse_distance)
+
+                current = self._metadata(list(set(ids)))
+                latest = {entry_id: i for i, entry_id in enumerate(ids)}
+                roadmap_fields = self._roadmap_fields([entries[i]["roadmap"] for i in latest.values()])
+                rows = []
+                for (entry_id, i), fields in zip(latest.items(), roadmap_fields):
+                    entry = entries[i]
+                    metadata = {**current.get(entry_id, ("", {}))[1], **entry["metadata"], **fields,
+                                "last_access": now, "generations": generations[i]}
+                    metadata = {key: value for key, value in metadata.items() if value is not None}
+                    rows.append((entry_id, entry["query"], np.asarray(entry["embedding"], dtype=np.float32).tobytes(),
+                                 json.dumps(metadata)))
+                self._db.executemany("INSERT OR REPLACE INTO roadmaps VALUES (?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            finally:
+                self._version = None
+
+    def record_access(self, accesses: dict):
+        """
+        Applies buffered access info ({id: (last_access, hits)}) to entry metadata.
+        """
+        if not accesses:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                updates = []
+                for entry_id, (_, metadata) in self._metadata(list(accesses)).items():
+                    last_access, hits = accesses[entry_id]
+                    metadata.update(last_access=last_access, hit_count=int(metadata.get("hit_count", 0)) + hits)
+                    updates.append((json.dumps(metadata), entry_id))
+                self._db.executemany("UPDATE roadmaps SET metadata = ? WHERE id = ?", updates)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def iter_metadata(self, page_size: int = 500):
+        """Yields (id, metadata) for every stored entry, a page at a time."""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                page = self._db.execute(
+                    "SELECT rowid, id, metadata FROM roadmaps WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, page_size),
+                ).fetchall()
+            if not page:
+                return
+            for rowid, entry_id, metadata in page:
+                yield entry_id, json.loads(metadata)
+            last_rowid = page[-1][0]
+
+    def migrate_roadmaps(self, page_size: int = 100) -> int:
+        """Moves roadmaps stored inline in entry metadata into the blob store; returns how many moved."""
+        if self.blobs is None:
+            raise ValueError("This roadmap store has no blob store to migrate to")
+        moved = last_rowid = 0
+        while True:
+            with self._lock:
+                page = self._db.execute(
+                    "SELECT rowid, id, metadata FROM roadmaps WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, page_size),
+                ).fetchall()
+            if not page:
+                return moved
+            last_rowid = page[-1][0]
+            inline = [(entry_id, json.loads(metadata)) for _, entry_id, metadata in page]
+            inline = [(entry_id, metadata) for entry_id, metadata in inline if metadata.get("roadmap")]
+            if not inline:
+                continue
+            hashes = self.blobs.put_many([metadata.pop("roadmap") for _, metadata in inline])
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    # Only rows still inline: a worker may have rewritten one since the page was read.
+                    updated = self._db.executemany(
+                        "UPDATE roadmaps SET metadata = ? WHERE id = ? AND json_extract(metadata, '$.roadmap') IS NOT NULL",
+                        [(json.dumps({**metadata, "roadmap_hash": blob_hash}), entry_id)
+                         for (entry_id, metadata), blob_hash in zip(inline, hashes)],
+                    )
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+            moved += updated.rowcount
+
+    def delete(self, ids: list):
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                self._db.execute(f"DELETE FROM roadmaps WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            self._version = None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM roadmaps").fetchone()[0]
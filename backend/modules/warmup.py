@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from collections import Counter
+
+from modules.exact_cache import request_key
+from modules.knowledge_base import JOB_ROLES_KNOWLEDGE
+
+# Goal / stack pairs for the built-in knowledge-base roles. Roles added to
+# JOB_ROLES_KNOWLEDGE without an entry here are seeded from their key alone.
+SEED_REQUESTS = {
+    "backend": ("Backend Developer", "Python, FastAPI, PostgreSQL, Docker"),
+    "frontend": ("Frontend Developer", "React, TypeScript, Vite"),
+    "ai_ml": ("AI Engineer", "Python, PyTorch, FastAPI"),
+    "data_science": ("Data Scientist", "Python, Pandas, Scikit-learn"),
+    "devops": ("DevOps Engineer", "Kubernetes, Terraform, GitHub Actions"),
+    "fullstack": ("Full Stack Developer", "React, Node.js, PostgreSQL"),
+}
+
+# Stands in for the GitHub analysis: pre-generated roadmaps are shared by
+# everyone asking for the same goal and stack.
+WARMUP_PROFILE = "Not provided (this roadmap is pre-generated for anyone with this goal and stack)."
+
+
+def seed_requests() -> list:
+    """One (career_goal, preferred_stack) pair per JOB_ROLES_KNOWLEDGE role."""
+    seeds = []
+    for role in JOB_ROLES_KNOWLEDGE:
+        seeds.append(SEED_REQUESTS.get(role, (role.replace("_", " ").title(), "")))
+    return seeds
+
+
+def load_request_log(path: str) -> list:
+    """
+    Reads (career_goal, preferred_stack) pairs from a JSONL request log: either
+    the TRACE_LOG written by modules/metrics.py or a replay file as used by
+    tools/replay_hit_rate.py. Invalid requests and unreadable lines are skipped.
+    """
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(row, dict) or row.get("outcome") == "invalid":
+                continue
+            goal = (row.get("career_goal") or "").strip()
+            if goal:
+                requests.append((goal, (row.get("preferred_stack", row.get("stack")) or "").strip()))
+    return requests
+
+
+def rank_candidates(seeds: list, logged: list, limit: int = None) -> list:
+    """
+    Merges seed and logged requests by cache key and ranks them by how often
+    they were requested (seeds count once). Each candidate is a dict with
+    key, career_goal, preferred_stack (the most common spelling) and count.
+    """
+    counts = Counter()
+    spellings = {}
+    order = {}
+    for goal, stack in list(seeds) + list(logged):
+        key = request_key(goal, stack)
+        counts[key] += 1
+        spellings.setdefault(key, Counter())[(goal, stack)] += 1
+        order.setdefault(key, len(order))
+
+    ranked = sorted(counts, key=lambda key: (-counts[key], order[key]))[:limit]
+    candidates = []
+    for key in ranked:
+        goal, stack = spellings[key].most_common(1)[0][0]
+        candidates.append({"key": key, "career_goal": goal, "preferred_stack": stack, "count": counts[key]})
+    return candidates
+
+
+class CacheWarmer:
+    """
+    Pre-generates roadmaps for ranked candidates on a background thread.
+
+    `is_warm(candidate)` returns the cache tier already holding the request (or
+    None) and `generate(candidate)` generates and saves it. Generations are
+    spaced at least `interval` seconds apart, wait while `live_requests()` is at
+    or above `max_live`, and wait out `wait_time()` (e.g. the circuit breaker's
+    retry_after), so warming never competes with live traffic.
+    """
+
+    def __init__(self, is_warm, generate, interval: float = 5.0, live_requests=None, max_live: int = 1,
+                 wait_time=None, on_report=None):
+        self.is_warm = is_warm
+        self.generate = generate
+        self.interval = interval
+        self.live_requests = live_requests or (lambda: 0)
+        self.max_live = max_live
+        self.wait_time = wait_time or (lambda: 0.0)
+        self.on_report = on_report
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_generation = 0.0
+        self.results = []
+
+    def start(self, candidates: list):
+        """Warms `candidates` in the background; returns immediately."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, args=(candidates,), name="cache-warmup", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _wait_for_capacity(self) -> bool:
+        """Blocks until a generation may start; False if the warmer was stopped."""
+        while not self._stop.is_set():
+            wait = max(self._last_generation + self.interval - time.monotonic(), self.wait_time())
+            if wait <= 0 and self.live_requests() < self.max_live:
+                return True
+            self._stop.wait(min(max(wait, 0.5), 5.0))
+        return False
+
+    def run(self, candidates: list) -> dict:
+        """Warms `candidates` in rank order on the calling thread and returns the report."""
+        self.results = [dict(candidate, status="pending") for candidate in candidates]
+        print(f"🔥 Warming the roadmap cache: {len(candidates)} candidates.")
+        for result in self.results:
+            if self._stop.is_set():
+                break
+            try:
+                tier = self.is_warm(result)
+                if tier:
+                    result["status"] = f"warm ({tier})"
+                    continue
+                if not self._wait_for_capacity():
+                    break
+                self._last_generation = time.monotonic()
+                self.generate(result)
+                result["status"] = "generated"
+                result["seconds"] = round(time.monotonic() - self._last_generation, 2)
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+                print(f"⚠️ Warm-up failed for '{result['career_goal']}': {e}")
+            finally:
+                if self.on_report:
+                    self.on_report(self.report())
+
+        report = self.report()
+        print(f"🔥 Warm-up finished: {report['warm']}/{report['candidates']} candidates warm "
+              f"({report['request_coverage']:.0%} of ranked requests).")
+        return report
+
+    def survey(self, candidates: list) -> dict:
+        """Checks which candidates are already warm, without generating anything."""
+        self.results = []
+        for candidate in candidates:
+            tier = self.is_warm(candidate)
+            self.results.append(dict(candidate, status=f"warm ({tier})" if tier else "cold"))
+        return self.report()
+
+    def report(self) -> dict:
+        """Warm coverage over the candidates, unweighted and weighted by request count."""
+        results = list(self.results)
+        warm = [r for r in results if r["status"] == "generated" or r["status"].startswith("warm")]
+        total_requests = sum(r["count"] for r in results)
+        statuses = Counter(r["status"].split(" ")[0] for r in results)
+        return {
+            "candidates": len(results),
+            "warm": len(warm),
+            "coverage": len(warm) / len(results) if results else 0.0,
+            "request_coverage": sum(r["count"] for r in warm) / total_requests if total_requests else 0.0,
+            "generated": statuses["generated"],
+            "failed": statuses["failed"],
+            "pending": statuses["pending"] + statuses["cold"],
+            "entries": results,
+        }
+
+
+def format_report(report: dict) -> str:
+    """Plain-text coverage table for the CLI and logs."""
+    lines = [f"{'count':>6}  {'status':<18} {'career goal | stack'}"]
+    for entry in report["entries"]:
+        lines.append(f"{entry['count']:>6}  {entry['status']:<18} {entry['career_goal']} | {entry['preferred_stack']}")
+    lines.append("")
+    lines.append(f"Warm coverage: {report['warm']}/{report['candidates']} candidates ({report['coverage']:.0%}), "
+                 f"{report['request_coverage']:.0%} of ranked requests; "
+                 f"{report['generated']} generated, {report['failed']} failed, {report['pending']} pending.")
+    return "\n".join(lines)
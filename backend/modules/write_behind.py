@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Takes roadmap cache inserts off the request path.
+
+    submit() only enqueues; a background worker groups pending items and hands
+    them to `flush_fn` as one batch once `max_batch` items are waiting or the
+    oldest has waited `max_delay` seconds. close() drains everything still queued.
+    """
+
+    def __init__(self, flush_fn, max_batch: int = 32, max_delay: float = 0.5, max_pending: int = 10000):
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"submitted": 0, "batches": 0, "written": 0, "failed": 0}
+
+    def submit(self, item) -> bool:
+        """
+        Enqueues one insert. Returns False (and drops the item) if the queue is
+        closed or full; a cache write is never worth blocking a response on.
+        """
+        if self._closed:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            print("⚠️ Write-behind queue full, dropping cache insert.")
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    def flush(self):
+        """Blocks until every item submitted so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 10.0):
+        """Stops accepting items, drains the queue and stops the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    # Drain whatever is left without waiting for the deadline.
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+    def _write(self, batch: list):
+        for start in range(0, len(batch), self.max_batch):
+            chunk = batch[start:start + self.max_batch]
+            try:
+                self.flush_fn(chunk)
+                self.stats["batches"] += 1
+                self.stats["written"] += len(chunk)
+            except Exception as e:
+                self.stats["failed"] += len(chunk)
+                print(f"DB Write Error ({len(chunk)} roadmaps): {e}")
+        for _ in batch:
+            self._queue.task_done()
@@ -0,0 +1,51 @@
+"""
+Generates roadmaps for a cohort file through the app's pipeline.
+
+The input is a JSONL or CSV (with header) file of github_url, career_goal and
+preferred_stack rows, plus an optional id. Results are appended to the output
+JSONL file as they complete, one line per row, with the row, its status ("ok",
+or the pipeline outcome such as "error" or "degraded"), the roadmap text and
+the time taken. Re-running with the same output file skips rows already "ok".
+
+    python -m tools.batch_generate cohort.csv -o roadmaps.jsonl --workers 8
+    python -m tools.batch_generate cohort.jsonl -o roadmaps.jsonl --rate 30 --no-resume
+
+Run from the backend directory, with the app's configuration. --rate caps the
+rows per minute that reach GitHub and the LLM; cached goals are not paced.
+"""
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL or CSV file of github_url, career_goal, preferred_stack rows")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--workers", type=int, help="parallel rows (default: BATCH_WORKERS)")
+    parser.add_argument("--rate", type=float, help="uncached rows per minute (default: BATCH_RATE_PER_MINUTE)")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of resuming")
+    args = parser.parse_args()
+
+    import app
+    from modules.batch import RateLimiter, run_batch_file
+
+    if args.rate is not None:
+        app.batch_limiter = RateLimiter(args.rate)
+
+    started = time.perf_counter()
+    processed = failed = 0
+    for result in run_batch_file(args.input, args.output, app.generate_roadmap_row,
+                                 workers=args.workers or app.BATCH_WORKERS, resume=not args.no_resume):
+        processed += 1
+        failed += result["status"] != "ok"
+        print(f"[{processed}] {result['id']}: {result['status']} ({result.get('outcome')}, {result['seconds']:.1f}s) "
+              f"{result['career_goal']}")
+    app.roadmap_writer.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"Processed {processed} rows in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} rows/s), "
+          f"{failed} failed. Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Size and read-latency benchmark for the roadmap blob store, run offline.
+
+Fills a fresh roadmap store with synthetic roadmaps stored inline (the layout
+before the blob store), measures it, migrates it in place with the same
+routine as `cache_admin migrate`, and measures it again:
+
+    disk_bytes       size of the store directory after VACUUM
+    read_p50_ms      nearest() + roadmap fetch latency, median
+    read_p95_ms      the same, 95th percentile
+
+--distinct sets the share of entries with a roadmap of their own; the rest
+repeat an earlier one (identical goals saved under several ids), which the
+blob store keeps once. Embeddings are random vectors, so no embedding model
+is needed.
+
+Usage (from the backend directory):
+    python -m tools.bench_blob_store --entries 2000 --store sqlite [--output blobs.json]
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from modules.blob_store import BlobStore
+from modules.cache_retention import vacuum_sqlite
+from modules.knowledge_base import JOB_ROLES_KNOWLEDGE
+from modules.roadmap_store import open_roadmap_store
+from tools.cache_admin import directory_size, migrate_blobs
+
+DIMENSIONS = 384
+PHASES = ["Foundations", "Core Skills", "Portfolio Project", "Production Practices", "Interview Prep"]
+
+
+def synthetic_roadmap(rng: random.Random, index: int) -> str:
+    """A markdown roadmap of roughly the length and shape the LLM produces."""
+    role, context = rng.choice(list(JOB_ROLES_KNOWLEDGE.items()))
+    words = context.replace(",", "").replace(".", "").split()
+    lines = [f"# Strategic Roadmap #{index}: {role.title()}", ""]
+    for week, phase in enumerate(PHASES, start=1):
+        lines += [f"## Phase {week}: {phase} (Weeks {2 * week - 1}-{2 * week})", ""]
+        for _ in range(rng.randint(4, 7)):
+            topic = " ".join(rng.sample(words, 4))
+            lines.append(f"- **{topic.title()}**: practice {' '.join(rng.sample(words, 8))}.")
+        lines += ["", f"> Milestone: ship a {rng.choice(words)} project and write up what you learned.", ""]
+    return "\n".join(lines)
+
+
+def synthetic_entries(count: int, distinct: float, seed: int) -> list:
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed).normal(size=(count, DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    roadmaps, entries = [], []
+    for i in range(count):
+        if not roadmaps or rng.random() < distinct:
+            roadmaps.append(synthetic_roadmap(rng, len(roadmaps)))
+            roadmap = roadmaps[-1]
+        else:
+            roadmap = rng.choice(roadmaps)
+        entries.append({
+            "entry_id": f"bench-{i}",
+            "query": f"goal {i} | stack {i % 7}",
+            "embedding": vectors[i].tolist(),
+            "roadmap": roadmap,
+            "metadata": {"career_goal": f"goal {i}", "stack": f"stack {i % 7}", "created_at": time.time()},
+        })
+    return entries
+
+
+def measure(store, path: str, queries: list) -> dict:
+    for path_to_vacuum in (store.sqlite_path, store.blobs.sqlite_path if store.blobs else None):
+        if path_to_vacuum:
+            vacuum_sqlite(path_to_vacuum)
+    store.nearest(queries[0])  # load indexes before timing
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        entry = store.nearest(query)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert entry is not None and entry["roadmap"]
+    timings.sort()
+    return {
+        "disk_bytes": directory_size(path),
+        "read_p50_ms": round(statistics.median(timings), 3),
+        "read_p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--distinct", type=float, default=0.7, help="share of entries with a unique roadmap")
+    parser.add_argument("--store", choices=["chroma", "sqlite"], default="chroma")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.entries, args.distinct, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = [
+        (np.asarray(entries[i]["embedding"]) + rng.normal(scale=0.01, size=DIMENSIONS)).tolist()
+        for i in rng.integers(0, len(entries), size=args.queries)
+    ]
+
+    path = tempfile.mkdtemp(prefix="bench_blob_store_")
+    store = open_roadmap_store(args.store, path=path)
+    for start in range(0, len(entries), 32):  # write-behind sized batches
+        store.add_many(entries[start:start + 32])
+
+    results = {"store": args.store, "entries": args.entries,
+               "raw_roadmap_bytes": sum(len(entry["roadmap"].encode("utf-8")) for entry in entries)}
+    results["inline"] = measure(store, path, queries)
+    store.blobs = BlobStore(path)
+    migration = migrate_blobs(store, path)
+    results["blobs"] = {**measure(store, path, queries), "migrated": migration["migrated"],
+                        "migration_seconds": migration["seconds"], **store.blobs.stats()}
+    results["size_reduction"] = round(1 - results["blobs"]["disk_bytes"] / results["inline"]["disk_bytes"], 3)
+
+    print(f"{'layout':<8} {'disk_bytes':>12} {'read_p50_ms':>12} {'read_p95_ms':>12}")
+    for layout in ("inline", "blobs"):
+        row = results[layout]
+        print(f"{layout:<8} {row['disk_bytes']:>12} {row['read_p50_ms']:>12} {row['read_p95_ms']:>12}")
+    print(f"{results['blobs']['blobs']} blobs for {args.entries} entries ({results['blobs']['codec']}, "
+          f"{results['blobs']['ratio']}x), store {results['size_reduction']:.0%} smaller")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
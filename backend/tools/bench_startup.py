@@ -0,0 +1,129 @@
+"""
+Startup-time benchmark for backend/app.py, run without network access.
+
+Each run happens in a fresh interpreter where outbound connections to
+anything but loopback are refused, so a regression that reintroduces
+network calls at import time fails loudly instead of skewing the numbers.
+
+Measured per run:
+    import_s         time to `import app`
+    first_request_s  time for the first request to be served (exact-cache hit)
+    cold_request_s   time for the first request of a second fresh interpreter
+                     that misses every cache: semantic lookup in an empty store
+                     (loading the embedding model), then generation against
+                     tools/fake_gemini.py with the profile from tools/fake_github.py
+    build_ui_s       time to build the Gradio Blocks (only with --ui)
+
+Usage (from the backend directory):
+    python -m tools.bench_startup --runs 5 [--ui] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from tools.fake_gemini import start_fake_gemini
+from tools.fake_github import start_fake_github
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, socket, sys, time
+
+_connect = socket.socket.connect
+def _loopback_only(self, address):
+    host = address[0] if isinstance(address, tuple) else address
+    if host not in ("127.0.0.1", "::1", "localhost") and not str(host).startswith("/"):
+        raise OSError(f"network disabled by bench_startup: {host}")
+    return _connect(self, address)
+socket.socket.connect = _loopback_only
+
+timings = {}
+start = time.perf_counter()
+import app
+timings["import_s"] = time.perf_counter() - start
+
+goal, stack = "Backend Developer", "Python, PostgreSQL"
+if "--cold" in sys.argv:
+    start = time.perf_counter()
+    output = list(app.generate_roadmap_endpoint("https://github.com/octocat", goal, stack))
+    timings["cold_request_s"] = time.perf_counter() - start
+    assert "Offline Roadmap" in output[-1], output
+    print(json.dumps(timings))
+    sys.exit()
+
+app.exact_cache.set(app.request_key(goal, stack), "Title: Seeded roadmap")
+start = time.perf_counter()
+output = list(app.generate_roadmap_endpoint("https://github.com/octocat", goal, stack))
+timings["first_request_s"] = time.perf_counter() - start
+assert "Seeded roadmap" in output[-1], output
+
+heavy = ("gradio", "chromadb", "google.generativeai")
+timings["heavy_modules_loaded"] = sorted(name for name in heavy if name in sys.modules)
+
+if "--ui" in sys.argv:
+    start = time.perf_counter()
+    app.build_demo()
+    timings["build_ui_s"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_child(flags: list, fakes: dict) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            **fakes,
+            "ROADMAP_DB_PATH": os.path.join(tmp, "roadmap_db"),
+            "EXACT_CACHE_DB": "",
+            "LIST_GEMINI_MODELS": "0",
+            "CACHE_COMPACT_INTERVAL": "0",
+        }
+        result = subprocess.run([sys.executable, "-c", CHILD] + flags, cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"benchmark child failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_once(build_ui: bool, fakes: dict) -> dict:
+    timings = run_child(["--ui"] if build_ui else [], fakes)
+    timings["cold_request_s"] = run_child(["--cold"], fakes)["cold_request_s"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ui", action="store_true", help="also time building the Gradio UI")
+    parser.add_argument("--output", help="write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    # Generation needs an LLM and GitHub; the local stand-ins serve both over loopback.
+    gemini_server, gemini_url, _ = start_fake_gemini()
+    github_server, github_url, _ = start_fake_github()
+    fakes = {"GEMINI_API_KEY": "bench", "GEMINI_API_ENDPOINT": gemini_url,
+             "GITHUB_TOKEN": "bench", "GITHUB_API_URL": github_url}
+    try:
+        runs = [run_once(args.ui, fakes) for _ in range(args.runs)]
+    finally:
+        gemini_server.shutdown()
+        github_server.shutdown()
+    summary = {"runs": runs}
+    for metric in ("import_s", "first_request_s", "cold_request_s", "build_ui_s"):
+        values = [run[metric] for run in runs if metric in run]
+        if values:
+            summary[metric] = {"median": statistics.median(values), "max": max(values)}
+            print(f"{metric:>16}: median {statistics.median(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+    print(f"Heavy modules loaded without the UI: {runs[0]['heavy_modules_loaded'] or 'none'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
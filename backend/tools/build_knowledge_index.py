@@ -0,0 +1,40 @@
+"""
+Precomputes the knowledge-base embedding index and reports retrieval latency.
+
+The artifact is written to KNOWLEDGE_INDEX_DIR (default backend/knowledge_index)
+as index-<version>.npz, where the version hashes the corpus and embedding model.
+The app loads it at first use instead of re-embedding the corpus, so run this
+at build/deploy time whenever the corpus changes.
+
+Usage (from the backend directory):
+    python -m tools.build_knowledge_index [--rebuild] [--query "Cloud Security Engineer"]
+"""
+import argparse
+import time
+
+from modules import knowledge_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if an artifact for this corpus exists")
+    parser.add_argument("--query", action="append", default=[], help="sample query to time (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = knowledge_base.setup_knowledge_base(rebuild=args.rebuild)
+    print(f"Index {index.version}: {len(index.ids)} documents, loaded in {time.perf_counter() - start:.3f}s")
+
+    queries = args.query or ["Backend Developer", "Machine Learning Engineer", "Site Reliability Engineer"]
+    for query in queries:
+        knowledge_base.search_knowledge(query)  # first call embeds and memoizes
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = knowledge_base.search_knowledge(query, k=2)
+        per_call_us = (time.perf_counter() - start) / args.repeat * 1e6
+        print(f"{query!r}: {per_call_us:.1f} µs/search -> {[doc_id for doc_id, _, _ in results]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Roadmap cache administration.
+
+    python -m tools.cache_admin stats             # size, age and hit-rate report
+    python -m tools.cache_admin compact [--dry-run]
+    python -m tools.cache_admin migrate           # move inline roadmaps into the blob store
+
+Run from the backend directory. Uses ROADMAP_STORE, ROADMAP_DB_PATH,
+CHROMA_SERVER_URL, ROADMAP_BLOB_PATH and the CACHE_* retention settings, like
+the app. Stop the app before compacting or migrating an embedded Chroma
+store; the sqlite and chroma-server stores can be maintained while workers
+are running.
+"""
+import argparse
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from modules.cache_retention import RetentionPolicy, compact, directory_size, last_used, vacuum_sqlite
+from modules.roadmap_store import STORE_BACKENDS, BaseRoadmapStore, open_roadmap_store
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGE_BUCKETS = [("< 1 day", 86400), ("< 7 days", 7 * 86400), ("< 30 days", 30 * 86400), ("older", float("inf"))]
+
+
+def collect_stats(store: BaseRoadmapStore, db_path: str) -> dict:
+    now = time.time()
+    ages = {label: 0 for label, _ in AGE_BUCKETS}
+    hits = generations = 0
+    popular = []
+    for entry_id, metadata in store.iter_metadata():
+        age = now - last_used(metadata)
+        ages[next(label for label, limit in AGE_BUCKETS if age < limit)] += 1
+        entry_hits = int(metadata.get("hit_count", 0))
+        hits += entry_hits
+        generations += int(metadata.get("generations", 1))
+        popular.append((entry_hits, metadata.get("career_goal", "?"), metadata.get("stack", "")))
+
+    popular.sort(reverse=True)
+    return {
+        "entries": sum(ages.values()),
+        "disk_bytes": directory_size(db_path) if getattr(store, "path", None) else None,
+        "last_used": ages,
+        "recorded_hits": hits,
+        "generations": generations,
+        # Hits vs. generations over the entries still retained (evicted entries drop out).
+        "semantic_hit_rate": round(hits / (hits + generations), 3) if hits + generations else None,
+        "most_hit": [
+            {"hits": entry_hits, "career_goal": goal, "stack": stack}
+            for entry_hits, goal, stack in popular[:10]
+        ],
+        "blobs": store.blobs.stats() if store.blobs is not None else None,
+    }
+
+
+def migrate_blobs(store: BaseRoadmapStore, db_path: str) -> dict:
+    """
+    Moves every roadmap still stored inline into the store's blob store, then
+    vacuums the index so the space the texts took is returned to the disk.
+    """
+    started = time.time()
+    local = getattr(store, "path", None) is not None
+    disk_before = directory_size(db_path) if local else None
+    moved = store.migrate_roadmaps()
+    for path in (store.sqlite_path, store.blobs.sqlite_path):
+        if path:
+            vacuum_sqlite(path)
+    return {
+        "migrated": moved,
+        "entries": store.count(),
+        "disk_bytes_before": disk_before,
+        "disk_bytes_after": directory_size(db_path) if local else None,
+        "blobs": store.blobs.stats(),
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["stats", "compact", "migrate"])
+    parser.add_argument("--db-path", default=os.getenv("ROADMAP_DB_PATH", os.path.join(BACKEND_DIR, "roadmap_db")))
+    parser.add_argument("--store", choices=STORE_BACKENDS, default=os.getenv("ROADMAP_STORE", "chroma"))
+    parser.add_argument("--server-url", default=os.getenv("CHROMA_SERVER_URL", ""))
+    parser.add_argument("--blob-path", help="blob store directory (default: ROADMAP_BLOB_PATH, as in the app)")
+    parser.add_argument("--dry-run", action="store_true", help="report what compaction would delete")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args()
+
+    blob_path = args.blob_path
+    if blob_path is None:
+        blob_path = os.getenv("ROADMAP_BLOB_PATH", "" if args.store == "chroma-server" else args.db_path)
+    if args.command == "migrate" and not blob_path:
+        parser.error("migrate needs a blob store: set --blob-path or ROADMAP_BLOB_PATH")
+
+    store = open_roadmap_store(args.store, path=args.db_path, url=args.server_url, blob_path=blob_path)
+    if args.command == "stats":
+        report = collect_stats(store, args.db_path)
+    elif args.command == "migrate":
+        report = migrate_blobs(store, args.db_path)
+    else:
+        report = compact(store, RetentionPolicy.from_env(), dry_run=args.dry_run)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if isinstance(value, dict):
+            print(f"{key}:")
+            for name, count in value.items():
+                print(f"  {name:<12} {count}")
+        elif isinstance(value, list):
+            print(f"{key}:")
+            for row in value:
+                print(f"  {row['hits']:>5}  {row['career_goal']} | {row['stack']}")
+        else:
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
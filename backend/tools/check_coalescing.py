@@ -0,0 +1,144 @@
+"""
+Concurrency check for single-flight request coalescing.
+
+Fires N identical roadmap requests at once (half through the sync endpoint on
+threads, half through the async endpoint) against a stub Gemini model and
+checks that exactly one upstream generation ran and that every caller saw the
+same stream of chunks. GitHub, market context and the caches are stubbed out,
+so this runs offline and leaves no files behind.
+
+Usage (from the backend directory):
+    python -m tools.check_coalescing [--requests 50] [--chunks 20] [--delay 0.02]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGemini:
+    """Counts generate_content calls and streams `chunks` pieces `delay` apart."""
+
+    def __init__(self, chunks: int, delay: float):
+        self.chunks = chunks
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def GenerativeModel(self, name):
+        stub = self
+
+        class Model:
+            def generate_content(self, prompt, stream=False, request_options=None):
+                stub._count()
+
+                def pieces():
+                    for i in range(stub.chunks):
+                        time.sleep(stub.delay)
+                        yield StubChunk(f"Step {i + 1}\n")
+                return pieces()
+
+            async def generate_content_async(self, prompt, stream=False, request_options=None):
+                stub._count()
+
+                async def pieces():
+                    for i in range(stub.chunks):
+                        await asyncio.sleep(stub.delay)
+                        yield StubChunk(f"Step {i + 1}\n")
+                return pieces()
+
+        return Model()
+
+
+def run_check(requests: int, chunks: int, delay: float) -> dict:
+    os.environ["ROADMAP_DB_PATH"] = tempfile.mkdtemp(prefix="coalesce-")
+    os.environ["EXACT_CACHE_DB"] = ""
+    os.environ["CACHE_COMPACT_INTERVAL"] = "0"
+    sys.path.insert(0, BACKEND_DIR)
+    import app
+
+    gemini = StubGemini(chunks, delay)
+    app.get_genai = lambda: gemini
+    app.lookup_cached_roadmap = lambda cache_key, search_query: (None, None)
+    app.get_market_context = lambda goal: "stub market context"
+    app.analyze_github_profile = lambda url: "stub github profile"
+
+    async def github_async(url):
+        return "stub github profile"
+    app.analyze_github_profile_async = github_async
+
+    goal, stack = "Data Engineer", "Python, Spark"
+    outputs = []
+    outputs_lock = threading.Lock()
+    start = threading.Barrier(requests // 2 + 1)
+
+    def sync_client(i):
+        # Spelling varies per client; all normalize to the same request key.
+        start.wait()
+        stream = list(app.generate_roadmap_endpoint("https://github.com/octocat", goal, stack if i % 2 else "spark,  PYTHON"))
+        with outputs_lock:
+            outputs.append(stream)
+
+    async def async_client():
+        stream = []
+        async for chunk in app.generate_roadmap_endpoint_async("https://github.com/octocat", goal.lower(), stack):
+            stream.append(chunk)
+        with outputs_lock:
+            outputs.append(stream)
+
+    async def async_clients(count):
+        await asyncio.gather(*(async_client() for _ in range(count)))
+
+    threads = [threading.Thread(target=sync_client, args=(i,)) for i in range(requests // 2)]
+    for thread in threads:
+        thread.start()
+    began = time.perf_counter()
+    start.wait()
+    asyncio.run(async_clients(requests - requests // 2))
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    reference = outputs[0]
+    return {
+        "requests": requests,
+        "upstream_calls": gemini.calls,
+        "identical_streams": all(stream == reference for stream in outputs),
+        "chunks_per_stream": len(reference),
+        "leaders": app.roadmap_flights.stats["leaders"],
+        "followers": app.roadmap_flights.stats["followers"],
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds between stub chunks")
+    args = parser.parse_args()
+
+    report = run_check(args.requests, args.chunks, args.delay)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    ok = report["upstream_calls"] == 1 and report["identical_streams"]
+    print("✅ Coalescing OK" if ok else "❌ Coalescing FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
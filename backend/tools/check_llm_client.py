@@ -0,0 +1,167 @@
+"""
+Behaviour check for modules/llm_client.py against local stub backends.
+
+Scenarios (each asserts the outcome and prints the client stats):
+    retry      a 503 is retried on the same backend
+    fallback   a non-retryable error moves on to the next backend in the chain
+    local      a local OSError (e.g. FileNotFoundError) is not retried
+    deadline   a backend silent past the first-chunk deadline is abandoned
+    budget     the call deadline ends retries and fallbacks early (sync and async)
+    share      with the default per-attempt timeout, a hung primary still leaves
+               time for a healthy fallback within the deadline (sync and async)
+    hedge      a slow first attempt is raced by a hedged second one (sync and async)
+    exhausted  every backend failing raises LLMUnavailable
+    http       the Gemini REST and OpenAI-compatible backends against
+               tools/fake_gemini.py, with Gemini down so the chain falls back
+
+Usage (from the backend directory):
+    python -m tools.check_llm_client
+"""
+import asyncio
+import sys
+import time
+import warnings
+
+from modules.llm_client import LLMClient, LLMUnavailable, GeminiBackend, OpenAICompatibleBackend, is_retryable
+from tools.fake_gemini import start_fake_gemini
+
+
+class StubError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StubBackend:
+    """
+    Plays one scripted behaviour per attempt: ("ok", delay) streams three
+    chunks after `delay` seconds, ("error", status) fails with that status.
+    """
+
+    def __init__(self, name: str, script: list):
+        self.name = name
+        self.label = f"stub:{name}"
+        self.script = list(script)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        return self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+    def stream(self, prompt: str, usage: dict):
+        kind, value = self._next()
+        if kind == "error":
+            raise StubError(f"{self.name} failed", status_code=value)
+        time.sleep(value)
+        for piece in (f"[{self.name}] ", "roadmap ", "text"):
+            yield piece
+        usage.update(prompt=len(prompt) // 4, response=3)
+
+    async def astream(self, prompt: str, usage: dict):
+        kind, value = self._next()
+        if kind == "error":
+            raise StubError(f"{self.name} failed", status_code=value)
+        await asyncio.sleep(value)
+        for piece in (f"[{self.name}] ", "roadmap ", "text"):
+            yield piece
+        usage.update(prompt=len(prompt) // 4, response=3)
+
+
+def collect(client: LLMClient, use_async: bool = False):
+    info = {}
+    if use_async:
+        async def run():
+            return "".join([text async for text in client.astream("prompt text", info)])
+        return asyncio.run(run()), info
+    return "".join(client.stream("prompt text", info)), info
+
+
+def check(name: str, condition: bool, client: LLMClient, detail=""):
+    print(f"{'✅' if condition else '❌'} {name}: {detail} stats={client.stats}")
+    return condition
+
+
+def main():
+    warnings.simplefilter("ignore")
+    results = []
+
+    client = LLMClient([StubBackend("primary", [("error", 503), ("ok", 0)])], retries=2, backoff=0.01)
+    text, info = collect(client)
+    results.append(check("retry", text.startswith("[primary]") and client.stats["retries"] == 1, client, info))
+
+    client = LLMClient([StubBackend("primary", [("error", 400)]), StubBackend("fallback", [("ok", 0)])],
+                       retries=2, backoff=0.01)
+    text, info = collect(client, use_async=True)
+    results.append(check("fallback", text.startswith("[fallback]") and client.stats["attempts"] == 2, client, info))
+
+    retryable = [is_retryable(FileNotFoundError("prompt.txt")), is_retryable(PermissionError("denied")),
+                 is_retryable(ConnectionResetError()), is_retryable(StubError("busy", status_code=503))]
+    results.append(check("local", retryable == [False, False, True, True], client, retryable))
+
+    client = LLMClient([StubBackend("stuck", [("ok", 1.0)]), StubBackend("fallback", [("ok", 0)])],
+                       retries=0, first_chunk_timeout=0.2)
+    started = time.perf_counter()
+    text, info = collect(client)
+    elapsed = time.perf_counter() - started
+    results.append(check("deadline", text.startswith("[fallback]") and elapsed < 0.9, client, f"{elapsed:.2f}s"))
+
+    for use_async in (False, True):
+        client = LLMClient([StubBackend("stuck", [("ok", 1.0)]), StubBackend("slow", [("ok", 1.0)])],
+                           retries=1, first_chunk_timeout=0.2, backoff=0.01, deadline=0.5)
+        started = time.perf_counter()
+        try:
+            collect(client, use_async=use_async)
+            results.append(check("budget", False, client, "no error raised"))
+        except LLMUnavailable as e:
+            elapsed = time.perf_counter() - started
+            ok = elapsed < 0.8 and client.stats["attempts"] < 4
+            results.append(check(f"budget ({'async' if use_async else 'sync'})", ok, client, f"{elapsed:.2f}s"))
+
+    for use_async in (False, True):
+        client = LLMClient([StubBackend("stuck", [("ok", 5.0)]), StubBackend("fallback", [("ok", 0)])],
+                           retries=1, backoff=0.01, deadline=1.0)
+        started = time.perf_counter()
+        text, info = collect(client, use_async=use_async)
+        elapsed = time.perf_counter() - started
+        ok = text.startswith("[fallback]") and client.stats["fallbacks"] == 1 and elapsed < 1.0
+        results.append(check(f"share ({'async' if use_async else 'sync'})", ok, client, f"{elapsed:.2f}s"))
+
+    for use_async in (False, True):
+        client = LLMClient([StubBackend("flaky", [("ok", 1.0), ("ok", 0.05)])], hedge_after=0.1)
+        started = time.perf_counter()
+        text, info = collect(client, use_async=use_async)
+        elapsed = time.perf_counter() - started
+        ok = text.startswith("[flaky]") and client.stats["hedge_wins"] == 1 and elapsed < 0.5
+        results.append(check(f"hedge ({'async' if use_async else 'sync'})", ok, client, f"{elapsed:.2f}s"))
+
+    client = LLMClient([StubBackend("a", [("error", 503)]), StubBackend("b", [("error", 500)])],
+                       retries=1, backoff=0.01)
+    try:
+        collect(client, use_async=True)
+        results.append(check("exhausted", False, client, "no error raised"))
+    except LLMUnavailable as e:
+        results.append(check("exhausted", len(e.errors) == 4, client, f"{len(e.errors)} attempts"))
+
+    down, down_url, _ = start_fake_gemini(first_token=0.0, error_rate=1.0)
+    up, up_url, up_state = start_fake_gemini(first_token=0.05, chunks=5, interval=0.01)
+    try:
+        import google.generativeai as genai
+
+        genai.configure(api_key="fake", transport="rest", client_options={"api_endpoint": down_url})
+        client = LLMClient([
+            GeminiBackend("gemini-2.0-flash", lambda: genai, rest=True, timeout=10),
+            OpenAICompatibleBackend("openai", "fake", "fake", f"{up_url}/v1", timeout=10),
+        ], retries=1, backoff=0.01)
+        text, info = collect(client)
+        async_text, _ = collect(client, use_async=True)
+        ok = text.startswith("Title:") and text == async_text and info.get("usage", {}).get("response", 0) > 0
+        results.append(check("http", ok and up_state.stats["streamed"] == 2, client, info))
+    finally:
+        down.shutdown()
+        up.shutdown()
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Local stand-in for the Gemini REST API, for load tests and offline runs.
+
+Serves POST /v1beta/models/<model>:generateContent and
+:streamGenerateContent (a streamed JSON array, or server-sent events with
+?alt=sse) with configurable time-to-first-token, chunk count and chunk
+spacing. Each response is a deterministic roadmap-shaped text derived from the
+prompt, and carries usageMetadata (prompt tokens estimated as chars / 4).
+POST /v1/chat/completions serves the same text in the OpenAI-compatible
+format (streamed as SSE when "stream" is set), for the openrouter/openai
+backends of the LLM chain. GET /_stats returns request counters.
+
+Usage (from the backend directory):
+    python -m tools.fake_gemini --port 8766 --first-token 0.3 --chunks 20 --interval 0.05
+
+Point the app at it with GEMINI_API_ENDPOINT=http://127.0.0.1:8766 (any
+GEMINI_API_KEY value works), or use it as an OpenAI-compatible fallback with
+LLM_CHAIN=gemini:gemini-2.0-flash,openai:fake OPENAI_BASE_URL=http://127.0.0.1:8766/v1.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeGeminiState:
+    def __init__(self, first_token: float = 0.3, chunks: int = 20, interval: float = 0.05,
+                 error_rate: float = 0.0):
+        self.lock = threading.Lock()
+        self.first_token = first_token
+        self.chunks = chunks
+        self.interval = interval
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "prompt_tokens": 0, "response_tokens": 0}
+
+    def count(self, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+
+def prompt_text(payload: dict) -> str:
+    if "messages" in payload:
+        return "".join(str(message.get("content", "")) for message in payload["messages"])
+    return "".join(
+        part.get("text", "")
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def roadmap_chunks(prompt: str, count: int) -> list:
+    """Splits a deterministic roadmap for `prompt` into `count` pieces."""
+    digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+    lines = [f"Title: Offline Roadmap {digest}\n\n", "Project Scope: Load testing\n\n", "Learning Roadmap:\n"]
+    lines += [f"- Step {i + 1}: Build milestone {i + 1} of project {digest}\n" for i in range(max(count - 3, 1))]
+    text = "".join(lines)
+    size = max(len(text) // count, 1)
+    pieces = [text[i * size:(i + 1) * size] for i in range(count - 1)]
+    pieces.append(text[(count - 1) * size:])
+    return [piece for piece in pieces if piece]
+
+
+def make_handler(state: FakeGeminiState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/_stats":
+                with state.lock:
+                    return self._send_json(200, dict(state.stats))
+            return self._send_json(404, {"error": {"code": 404, "message": "Not Found", "status": "NOT_FOUND"}})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            method = "chatCompletions" if url.path.endswith("/chat/completions") else url.path.rsplit(":", 1)[-1]
+            if method not in ("generateContent", "streamGenerateContent", "chatCompletions"):
+                return self._send_json(404, {"error": {"code": 404, "message": "Not Found", "status": "NOT_FOUND"}})
+
+            state.count(requests=1)
+            if state.error_rate and random.random() < state.error_rate:
+                state.count(errors=1)
+                return self._send_json(503, {"error": {"code": 503, "message": "Overloaded", "status": "UNAVAILABLE"}})
+
+            prompt = prompt_text(payload)
+            pieces = roadmap_chunks(prompt, state.chunks)
+            usage = {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": sum(len(piece) for piece in pieces) // 4,
+            }
+            usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+            state.count(prompt_tokens=usage["promptTokenCount"], response_tokens=usage["candidatesTokenCount"])
+
+            time.sleep(state.first_token)
+            if method == "chatCompletions":
+                return self._chat(payload, pieces, usage)
+            if method == "generateContent":
+                time.sleep(state.interval * (len(pieces) - 1))
+                return self._send_json(200, self._response("".join(pieces), usage, last=True))
+            state.count(streamed=1)
+            self._stream(pieces, usage, sse=parse_qs(url.query).get("alt") == ["sse"])
+
+        def _response(self, text: str, usage: dict, last: bool) -> dict:
+            candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+            response = {"candidates": [candidate], "modelVersion": "fake-gemini"}
+            if last:
+                candidate["finishReason"] = "STOP"
+                response["usageMetadata"] = usage
+            return response
+
+        def _chat(self, payload: dict, pieces: list, usage: dict):
+            base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": payload.get("model", "fake")}
+            usage = {
+                "prompt_tokens": usage["promptTokenCount"],
+                "completion_tokens": usage["candidatesTokenCount"],
+                "total_tokens": usage["totalTokenCount"],
+            }
+            if not payload.get("stream"):
+                time.sleep(state.interval * (len(pieces) - 1))
+                return self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                }]})
+
+            state.count(streamed=1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            events = []
+            for i, piece in enumerate(pieces):
+                events.append({**base, "object": "chat.completion.chunk", "choices": [{
+                    "index": 0, "delta": {"content": piece},
+                    "finish_reason": "stop" if i == len(pieces) - 1 else None,
+                }]})
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+            try:
+                for i, event in enumerate(events):
+                    if i and i < len(pieces):
+                        time.sleep(state.interval)
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _stream(self, pieces: list, usage: dict, sse: bool):
+            # No Content-Length: the body ends when the connection closes.
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for i, piece in enumerate(pieces):
+                    if i:
+                        time.sleep(state.interval)
+                    chunk = json.dumps(self._response(piece, usage, last=i == len(pieces) - 1))
+                    if sse:
+                        self.wfile.write(f"data: {chunk}\r\n\r\n".encode())
+                    else:
+                        self.wfile.write((("[" if i == 0 else ",\r\n") + chunk).encode())
+                    self.wfile.flush()
+                if not sse:
+                    self.wfile.write(b"]")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def start_fake_gemini(port: int = 0, **state_options):
+    """
+    Starts the fake API on a background thread.
+    Returns (server, base_url, state); call server.shutdown() when done.
+    """
+    state = FakeGeminiState(**state_options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-token", type=float, default=0.3, help="seconds before the first chunk")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_fake_gemini(
+        args.port, first_token=args.first_token, chunks=args.chunks,
+        interval=args.interval, error_rate=args.error_rate,
+    )
+    print(f"Fake Gemini API running at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
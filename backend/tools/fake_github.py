@@ -0,0 +1,230 @@
+"""
+Local stand-in for the GitHub REST API, for exercising the GitHub client offline.
+
+Serves GET /users/<username>/repos with deterministic repositories, strong
+ETags, If-None-Match revalidation (304s do not consume quota) and
+X-RateLimit-* headers. POST /graphql replays the recorded profile responses
+in tools/fixtures/github_graphql.json page by page (login "ghost" is not
+found; an exhausted quota answers with a RATE_LIMITED error, as GitHub does). GET /_stats returns request counters and POST /_touch/<username>
+changes a user's repos so the next revalidation returns 200.
+
+Usage (from the backend directory):
+    python -m tools.fake_github --port 8765            # serve until Ctrl+C
+    python -m tools.fake_github --selfcheck            # verify cache + revalidation
+
+Point the app at it with GITHUB_API_URL=http://127.0.0.1:8765.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GRAPHQL_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "github_graphql.json")
+LANGUAGES = ["Python", "TypeScript", "Go", "Rust", "Java", "JavaScript", "Dockerfile", None]
+
+
+class FakeGitHubState:
+    def __init__(self, rate_limit: int = 5000, latency: float = 0.0):
+        self.lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset_at = int(time.time()) + 3600
+        self.latency = latency
+        self.revisions = {}
+        self.stats = {"requests": 0, "ok": 0, "not_modified": 0, "rate_limited": 0, "graphql": 0}
+        with open(GRAPHQL_FIXTURE, encoding="utf-8") as f:
+            self.graphql_pages = json.load(f)["pages"]
+
+    def repos_for(self, username: str, per_page: int) -> list:
+        revision = self.revisions.get(username, 0)
+        repos = []
+        for i in range(per_page):
+            seed = int(hashlib.sha256(f"{username}/{i}".encode()).hexdigest(), 16)
+            repos.append({
+                "name": f"{username}-project-{i}",
+                "language": LANGUAGES[seed % len(LANGUAGES)],
+                "description": None if seed % 5 == 0 else f"Sample project {i} (rev {revision}) by {username}",
+                "stargazers_count": seed % 300,
+                "topics": ["api", "cli", "ml", "web"][seed % 4: seed % 4 + 2],
+            })
+        return repos
+
+
+def make_handler(state: FakeGitHubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload, headers: dict = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _rate_headers(self) -> dict:
+            return {
+                "X-RateLimit-Limit": str(state.rate_limit),
+                "X-RateLimit-Remaining": str(state.remaining),
+                "X-RateLimit-Reset": str(state.reset_at),
+            }
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+
+            if url.path == "/_stats":
+                with state.lock:
+                    return self._send_json(200, {**state.stats, "remaining": state.remaining})
+
+            if len(parts) != 3 or parts[0] != "users" or parts[2] != "repos":
+                return self._send_json(404, {"message": "Not Found"})
+
+            if state.latency:
+                time.sleep(state.latency)
+
+            username = parts[1]
+            per_page = int(parse_qs(url.query).get("per_page", ["30"])[0])
+            body = json.dumps(state.repos_for(username, per_page)).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+            with state.lock:
+                state.stats["requests"] += 1
+                if self.headers.get("If-None-Match") == etag:
+                    state.stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    for name, value in self._rate_headers().items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    return
+                if state.remaining <= 0:
+                    state.stats["rate_limited"] += 1
+                    return self._send_json(403, {"message": "API rate limit exceeded"}, self._rate_headers())
+                state.remaining -= 1
+                state.stats["ok"] += 1
+                headers = {"ETag": etag, **self._rate_headers()}
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if parts == ["graphql"]:
+                return self._graphql()
+            if len(parts) == 2 and parts[0] == "_touch":
+                with state.lock:
+                    state.revisions[parts[1]] = state.revisions.get(parts[1], 0) + 1
+                return self._send_json(200, {"revision": state.revisions[parts[1]]})
+            return self._send_json(404, {"message": "Not Found"})
+
+        def _graphql(self):
+            length = int(self.headers.get("Content-Length", 0))
+            variables = json.loads(self.rfile.read(length) or b"{}").get("variables", {})
+            if state.latency:
+                time.sleep(state.latency)
+
+            with state.lock:
+                state.stats["graphql"] += 1
+                if state.remaining <= 0:
+                    state.stats["rate_limited"] += 1
+                    return self._send_json(200, {
+                        "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}],
+                    }, self._rate_headers())
+                state.remaining -= 1
+            if variables.get("login") == "ghost":
+                return self._send_json(200, {
+                    "data": {"user": None},
+                    "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a User with the login of 'ghost'."}],
+                }, self._rate_headers())
+
+            page_index = 0
+            for index, page in enumerate(state.graphql_pages[:-1]):
+                if page["data"]["user"]["repositories"]["pageInfo"]["endCursor"] == variables.get("after"):
+                    page_index = index + 1
+            return self._send_json(200, state.graphql_pages[page_index], self._rate_headers())
+
+    return Handler
+
+
+def start_fake_github(port: int = 0, **state_options):
+    """
+    Starts the fake API on a background thread.
+    Returns (server, base_url, state); call server.shutdown() when done.
+    """
+    state = FakeGitHubState(**state_options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def selfcheck():
+    from modules.github_client import GitHubClient
+
+    server, base_url, state = start_fake_github()
+    try:
+        client = GitHubClient(base_url=base_url, ttl=0.2)
+        first = client.get_repos("octocat")
+        client.get_repos("octocat")
+        assert state.stats["requests"] == 1, "second call inside the TTL should not hit the network"
+
+        time.sleep(0.25)
+        assert client.get_repos("octocat") == first
+        assert state.stats["not_modified"] == 1, "expired entry should revalidate with a 304"
+        assert state.remaining == state.rate_limit - 1, "304 must not consume rate limit"
+
+        client.session.post(f"{base_url}/_touch/octocat")
+        time.sleep(0.25)
+        assert client.get_repos("octocat") != first, "changed repos should be refetched"
+
+        repos = client.get_profile_repos("octocat")
+        assert state.stats["graphql"] == 2 and len(repos) == 5, "GraphQL mode should follow pagination"
+        client.get_profile_repos("octocat")
+        assert state.stats["graphql"] == 2, "GraphQL profiles should be cached for the TTL"
+
+        time.sleep(0.25)
+        with state.lock:
+            state.remaining = 0
+        assert client.get_profile_repos("octocat") == repos, "a rate-limited GraphQL refresh should serve stale repos"
+        assert client.stats["stale_served"] == 1
+        print("✅ GitHub client cache and revalidation behave as expected.")
+        print(f"Client stats: {client.stats}")
+        print(f"Server stats: {state.stats}")
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each repos response")
+    parser.add_argument("--selfcheck", action="store_true")
+    args = parser.parse_args()
+
+    if args.selfcheck:
+        selfcheck()
+        return
+
+    server, base_url, _ = start_fake_github(args.port, rate_limit=args.rate_limit, latency=args.latency)
+    print(f"Fake GitHub API running at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline load test for the roadmap pipeline.
+
+Drives generate_roadmap_endpoint_async (or the sync endpoint with --target
+sync) at a fixed concurrency against local stand-ins: tools/fake_gemini.py
+for the model, tools/fake_github.py for GitHub, and a temporary directory for
+ChromaDB and the exact-match cache. Nothing leaves the machine.
+
+Workloads, run in the order given:
+    cold   unique requests against empty caches
+    warm   the cold requests replayed (every one should hit a cache)
+    mixed  --hot-ratio of requests drawn from the cold set, the rest new
+
+Reported per workload: throughput, latency and time-to-first-chunk
+p50/p95/p99, cache hit rate, errors, upstream calls and token usage. Results
+are written as JSON so runs can be diffed against each other.
+
+Usage (from the backend directory):
+    python -m tools.loadtest --requests 200 --concurrency 32 --output loadtest.json
+    python -m tools.loadtest --hashed-embeddings   # no ONNX model download needed
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tools.fake_gemini import start_fake_gemini
+from tools.fake_github import start_fake_github
+
+CACHE_MARKER = "**[Loaded from Database Cache]**"
+ERROR_MARKER = "An error occurred"
+GOALS = [
+    "Backend Developer", "Frontend Engineer", "Machine Learning Engineer", "Data Scientist",
+    "DevOps Engineer", "Full Stack Developer", "Mobile Developer", "Security Engineer",
+    "Data Engineer", "Game Developer", "Embedded Engineer", "Site Reliability Engineer",
+]
+TECHS = [
+    "Python", "Go", "Rust", "Java", "Kotlin", "TypeScript", "React", "Vue", "Svelte", "Django",
+    "FastAPI", "Spring", "Node.js", "PostgreSQL", "MongoDB", "Redis", "Kafka", "Spark",
+    "PyTorch", "TensorFlow", "Kubernetes", "Terraform", "AWS", "GCP", "Azure", "Docker",
+    "Swift", "Flutter", "Unity", "C++",
+]
+
+
+class HashingEmbeddingFunction:
+    """
+    Bag-of-words hashing embedding (384 dims, like the default model) so the
+    semantic tier can be exercised without downloading the ONNX model.
+    """
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(384, dtype=np.float32)
+            for word in text.lower().replace(",", " ").replace("|", " ").split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 384] += 1.0
+            vectors.append(vector / (np.linalg.norm(vector) or 1.0))
+        return vectors
+
+    @staticmethod
+    def name():
+        return "loadtest-hashing"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashingEmbeddingFunction()
+
+    def is_legacy(self):
+        return False
+
+
+def make_requests(count: int, rng: random.Random, seen: set) -> list:
+    """`count` (github_url, goal, stack) tuples whose goal/stack pairs are new to `seen`."""
+    requests = []
+    while len(requests) < count:
+        goal = rng.choice(GOALS)
+        stack = ", ".join(sorted(rng.sample(TECHS, 3)))
+        if (goal, stack) in seen:
+            continue
+        seen.add((goal, stack))
+        requests.append((f"https://github.com/user{rng.randrange(50)}", goal, stack))
+    return requests
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+    return {"p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99), "max": round(ordered[-1], 4)}
+
+
+async def run_async(app, requests: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with semaphore:
+            start = time.perf_counter()
+            first = None
+            text = ""
+            async for text in app.generate_roadmap_endpoint_async(*request):
+                if first is None:
+                    first = time.perf_counter() - start
+            return start, first, time.perf_counter() - start, text
+
+    return await asyncio.gather(*(one(request) for request in requests))
+
+
+def run_sync(app, requests: list, concurrency: int) -> list:
+    def one(request):
+        start = time.perf_counter()
+        first = None
+        text = ""
+        for text in app.generate_roadmap_endpoint(*request):
+            if first is None:
+                first = time.perf_counter() - start
+        return start, first, time.perf_counter() - start, text
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, requests))
+
+
+def run_workload(app, target: str, requests: list, concurrency: int, gemini_state, github_state) -> dict:
+    gemini_before = dict(gemini_state.stats)
+    github_before = dict(github_state.stats)
+
+    began = time.perf_counter()
+    if target == "async":
+        results = asyncio.run(run_async(app, requests, concurrency))
+    else:
+        results = run_sync(app, requests, concurrency)
+    elapsed = time.perf_counter() - began
+    app.roadmap_writer.flush()
+
+    hits = sum(1 for *_, text in results if text.startswith(CACHE_MARKER))
+    errors = sum(1 for *_, text in results if ERROR_MARKER in text)
+    return {
+        "requests": len(requests),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 2) if elapsed else None,
+        "latency_s": percentiles([total for _, _, total, _ in results]),
+        "first_chunk_s": percentiles([first for _, first, _, _ in results if first is not None]),
+        "hit_rate": round(hits / len(requests), 3) if requests else None,
+        "errors": errors,
+        "gemini_calls": gemini_state.stats["requests"] - gemini_before["requests"],
+        "github_calls": github_state.stats["requests"] - github_before["requests"],
+        "prompt_tokens": gemini_state.stats["prompt_tokens"] - gemini_before["prompt_tokens"],
+        "response_tokens": gemini_state.stats["response_tokens"] - gemini_before["response_tokens"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workloads", default="cold,warm,mixed")
+    parser.add_argument("--target", choices=["async", "sync"], default="async")
+    parser.add_argument("--hot-ratio", type=float, default=0.7, help="share of mixed requests drawn from the cold set")
+    parser.add_argument("--first-token", type=float, default=0.3, help="fake Gemini seconds to first chunk")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="fake Gemini seconds between chunks")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--github-latency", type=float, default=0.05)
+    parser.add_argument("--hashed-embeddings", action="store_true", help="use a hashing embedding instead of ONNX")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args()
+
+    gemini_server, gemini_url, gemini_state = start_fake_gemini(
+        first_token=args.first_token, chunks=args.chunks, interval=args.interval, error_rate=args.gemini_error_rate,
+    )
+    github_server, github_url, github_state = start_fake_github(latency=args.github_latency)
+    workdir = tempfile.mkdtemp(prefix="roadmap-loadtest-")
+    os.environ.update({
+        "GEMINI_API_KEY": "loadtest",
+        "GEMINI_API_ENDPOINT": gemini_url,
+        "GITHUB_TOKEN": "loadtest",
+        "GITHUB_API_URL": github_url,
+        "ROADMAP_DB_PATH": os.path.join(workdir, "roadmap_db"),
+        "KNOWLEDGE_INDEX_DIR": os.path.join(workdir, "knowledge_index"),
+        "CACHE_COMPACT_INTERVAL": "0",
+    })
+    os.environ.pop("EXACT_CACHE_DB", None)
+
+    try:
+        if args.hashed_embeddings:
+            import modules.roadmap_store as roadmap_store
+
+            embedding_function = HashingEmbeddingFunction()
+            roadmap_store.get_default_embedding_function = lambda: embedding_function
+
+        import app
+
+        # Open the store and build the knowledge index up front so the first
+        # workload measures requests, not one-time setup.
+        started = time.perf_counter()
+        app.get_roadmap_store()
+        app.get_market_context("warm-up")
+        setup_s = round(time.perf_counter() - started, 3)
+
+        rng = random.Random(args.seed)
+        seen = set()
+        cold = make_requests(args.requests, rng, seen)
+        report = {
+            "config": vars(args),
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "setup_s": setup_s,
+            "workloads": {},
+        }
+        for workload in args.workloads.split(","):
+            if workload == "cold":
+                requests = cold
+            elif workload == "warm":
+                requests = list(cold)
+                rng.shuffle(requests)
+            elif workload == "mixed":
+                hot = int(args.requests * args.hot_ratio)
+                requests = [rng.choice(cold) for _ in range(hot)] + make_requests(args.requests - hot, rng, seen)
+                rng.shuffle(requests)
+            else:
+                parser.error(f"unknown workload: {workload}")
+
+            print(f"▶️ {workload}: {len(requests)} requests at concurrency {args.concurrency}")
+            result = run_workload(app, args.target, requests, args.concurrency, gemini_state, github_state)
+            report["workloads"][workload] = result
+            print(f"   {result['throughput_rps']} req/s, p50 {result['latency_s']['p50']}s, "
+                  f"p99 {result['latency_s']['p99']}s, first chunk p50 {result['first_chunk_s']['p50']}s, "
+                  f"hit rate {result['hit_rate']}, errors {result['errors']}")
+
+        report["cache_tiers"] = app.get_cache_stats()
+        report["write_behind"] = dict(app.roadmap_writer.stats)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+    finally:
+        gemini_server.shutdown()
+        github_server.shutdown()
+        if "app" in sys.modules:
+            sys.modules["app"].roadmap_writer.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
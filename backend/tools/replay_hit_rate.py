@@ -0,0 +1,76 @@
+"""
+Offline hit-rate report for the semantic roadmap cache.
+
+Replays a JSONL file of requests ({"career_goal": ..., "preferred_stack": ...}
+per line) against an empty, in-memory copy of the cache and reports how many
+would have been served from it at each distance threshold. Every query is
+embedded exactly once, like the live endpoint does.
+
+Usage (from the backend directory):
+    python -m tools.replay_hit_rate replay.jsonl --thresholds 0.1 0.2 0.3 0.4
+"""
+import argparse
+import json
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+from modules.exact_cache import request_key
+
+
+def load_replay(path):
+    replay = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                replay.append((row.get("career_goal", ""), row.get("preferred_stack", "")))
+    return replay
+
+
+def simulate(embeddings, threshold):
+    """
+    Replays requests in order: a request hits when its nearest stored query is
+    closer than `threshold` (squared L2, Chroma's default space); misses are stored.
+    """
+    stored = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+    hits = 0
+    for vector in embeddings:
+        if len(stored):
+            distances = np.sum((stored - vector) ** 2, axis=1)
+            if distances.min() < threshold:
+                hits += 1
+                continue
+        stored = np.vstack([stored, vector])
+    return hits, len(stored)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("replay_file", help="JSONL file with career_goal / preferred_stack per line")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.05, 0.1, 0.2, 0.3, 0.4, 0.5])
+    args = parser.parse_args()
+
+    replay = load_replay(args.replay_file)
+    if not replay:
+        print("Replay file is empty.")
+        return
+
+    queries = [f"{goal} | {stack}" for goal, stack in replay]
+    embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    embeddings = np.asarray(embedding_function(queries), dtype=np.float32)
+
+    total = len(replay)
+    exact_hits = total - len({request_key(goal, stack) for goal, stack in replay})
+    print(f"Requests replayed: {total}")
+    print(f"Exact-match tier hit rate: {exact_hits / total:.1%}")
+    print()
+    print(f"{'threshold':>10} {'hits':>8} {'hit rate':>10} {'entries':>8}")
+    for threshold in sorted(args.thresholds):
+        hits, entries = simulate(embeddings, threshold)
+        print(f"{threshold:>10.2f} {hits:>8} {hits / total:>10.1%} {entries:>8}")
+
+
+if __name__ == "__main__":
+    main()
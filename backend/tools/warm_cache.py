@@ -0,0 +1,50 @@
+"""
+Pre-generates roadmaps for popular goals and reports warm coverage.
+
+Candidates are the JOB_ROLES_KNOWLEDGE roles plus the goal/stack pairs in a
+request log (the TRACE_LOG JSONL, or a replay file), ranked by frequency.
+Each one already in the exact-match or semantic cache is left alone; the rest
+are generated through the app's LLM chain and saved to both caches.
+
+    python -m tools.warm_cache --log traces.jsonl --limit 50 --interval 5
+    python -m tools.warm_cache --report-only      # coverage only, no generation
+
+Run from the backend directory, with the app's configuration (ROADMAP_DB_PATH,
+EXACT_CACHE_DB, LLM_CHAIN, ...). This process cannot see the server's live
+traffic, so --interval is what keeps it from competing with it; the server's
+own warm-up (WARMUP_ON_START=1) also pauses while requests are in flight.
+"""
+import argparse
+import json
+
+from modules.warmup import format_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="JSONL request log (default: WARMUP_LOG / TRACE_LOG)")
+    parser.add_argument("--limit", type=int, help="warm at most this many top candidates (default: WARMUP_LIMIT)")
+    parser.add_argument("--interval", type=float, help="minimum seconds between generations")
+    parser.add_argument("--report-only", action="store_true", help="report coverage without generating")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    import app
+
+    candidates = app.warmup_candidates(args.log, args.limit)
+    if args.interval is not None:
+        app.cache_warmer.interval = args.interval
+    if args.report_only:
+        report = app.cache_warmer.survey(candidates)
+    else:
+        report = app.cache_warmer.run(candidates)
+        app.roadmap_writer.flush()
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()